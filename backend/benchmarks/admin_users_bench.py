@@ -0,0 +1,188 @@
+"""
+Benchmark for GET /api/admin/users: legacy per-intern N+1 queries vs the aggregation pipeline.
+
+What this script does:
+  - Seeds a scratch database (default: <DB_NAME>_bench) with N interns, each with
+    progress records and git submissions for a random number of days.
+  - Builds the same indexes the API creates at startup.
+  - Times the legacy loop (one users query + two queries per intern) against
+    server.admin_users_pipeline (one aggregate call) and checks both return the same data.
+  - Drops the scratch database afterwards unless --keep is given.
+
+Usage:
+  python benchmarks/admin_users_bench.py --interns 500 --runs 5
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+
+from mongo_indexes import ensure_indexes  # noqa: E402
+from server import admin_users_pipeline  # noqa: E402
+
+
+MONGO_URL = os.environ.get("MONGO_URL")
+DB_NAME = os.environ.get("DB_NAME")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the /admin/users query strategies.")
+    parser.add_argument("--interns", type=int, default=500, help="Number of interns to seed.")
+    parser.add_argument("--max-days", type=int, default=60, help="Max progress days per intern.")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per strategy.")
+    parser.add_argument("--db", default=None, help="Scratch database name (default: <DB_NAME>_bench).")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded database afterwards.")
+    return parser.parse_args()
+
+
+async def seed(db, interns: int, max_days: int):
+    now = datetime.now(timezone.utc).isoformat()
+    users, progress, git_subs = [], [], []
+    for i in range(interns):
+        uid = str(uuid.uuid4())
+        users.append({
+            "id": uid,
+            "name": f"Bench Intern {i}",
+            "email": f"bench{i}@example.com",
+            "password_hash": "x",
+            "role": "intern",
+            "course": "aiml",
+            "created_at": now,
+        })
+        for day in range(1, random.randint(1, max_days) + 1):
+            completed = random.random() < 0.8
+            progress.append({
+                "id": str(uuid.uuid4()),
+                "user_id": uid,
+                "day_number": day,
+                "completed_tasks": ["t1", "t2"] if completed or random.random() < 0.5 else [],
+                "is_completed": completed,
+                "updated_at": now,
+            })
+            if completed:
+                git_subs.append({
+                    "user_id": uid,
+                    "day_number": day,
+                    "repo_url": f"https://github.com/bench/intern-{i}",
+                    "branch": f"day-{day}",
+                    "submitted_at": now,
+                })
+    await db.users.insert_many(users)
+    if progress:
+        await db.progress.insert_many(progress)
+    if git_subs:
+        await db.git_submissions.insert_many(git_subs)
+    return len(users), len(progress), len(git_subs)
+
+
+async def legacy_admin_users(db, query: dict):
+    users = await db.users.find(query, {"_id": 0, "password_hash": 0}).to_list(1000)
+    for u in users:
+        progress = await db.progress.find({"user_id": u["id"]}, {"_id": 0}).to_list(1000)
+        git_subs = await db.git_submissions.find({"user_id": u["id"]}, {"_id": 0}).to_list(1000)
+        git_day_nums = {g.get("day_number") for g in git_subs if g.get("day_number") is not None}
+        active_day_set = {
+            p.get("day_number") for p in progress
+            if p.get("day_number") is not None and (p.get("is_completed") or p.get("completed_tasks"))
+        }
+        active_day_set.update(git_day_nums)
+        u["progress"] = progress
+        u["completed_days"] = sum(1 for p in progress if p.get("is_completed"))
+        u["active_days"] = len(active_day_set)
+        u["total_days"] = 120
+        u["git_submissions"] = [
+            {
+                "day_number": g.get("day_number"),
+                "repo_url": g.get("repo_url"),
+                "branch": g.get("branch"),
+                "submitted_at": g.get("submitted_at"),
+            }
+            for g in git_subs
+            if g.get("day_number") and g.get("repo_url")
+        ]
+    return users
+
+
+async def pipeline_admin_users(db, query: dict):
+    return await db.users.aggregate(admin_users_pipeline(query)).to_list(1000)
+
+
+async def time_runs(fn, db, query: dict, runs: int):
+    timings = []
+    result = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = await fn(db, query)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings, result
+
+
+def summarize(label: str, timings):
+    print(
+        f"  {label:<10s} median={statistics.median(timings):8.1f} ms  "
+        f"min={min(timings):8.1f} ms  max={max(timings):8.1f} ms"
+    )
+
+
+def normalized(users):
+    return sorted(
+        (
+            u["id"],
+            u["completed_days"],
+            u["active_days"],
+            sorted((g["day_number"], g["repo_url"]) for g in u["git_submissions"]),
+            len(u["progress"]),
+        )
+        for u in users
+    )
+
+
+async def main():
+    args = parse_args()
+    if not MONGO_URL or not DB_NAME:
+        raise SystemExit("MONGO_URL and DB_NAME must be set in the environment.")
+
+    bench_db_name = args.db or f"{DB_NAME}_bench"
+    if bench_db_name == DB_NAME:
+        raise SystemExit("Refusing to seed the live database; pass a different --db.")
+
+    client = AsyncIOMotorClient(MONGO_URL)
+    db = client[bench_db_name]
+    await client.drop_database(bench_db_name)
+
+    print("=" * 70)
+    print("ADMIN USERS BENCHMARK")
+    print("DB:", bench_db_name)
+    users, progress, git_subs = await seed(db, args.interns, args.max_days)
+    print(f"Seeded {users} interns, {progress} progress records, {git_subs} git submissions")
+    await ensure_indexes(db)
+    print("=" * 70)
+
+    query = {"role": "intern"}
+    legacy_timings, legacy_result = await time_runs(legacy_admin_users, db, query, args.runs)
+    pipeline_timings, pipeline_result = await time_runs(pipeline_admin_users, db, query, args.runs)
+
+    summarize("legacy", legacy_timings)
+    summarize("pipeline", pipeline_timings)
+    speedup = statistics.median(legacy_timings) / max(statistics.median(pipeline_timings), 1e-9)
+    print(f"  speedup    {speedup:.1f}x")
+    print("  results match:", normalized(legacy_result) == normalized(pipeline_result))
+
+    if not args.keep:
+        await client.drop_database(bench_db_name)
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+"""
+Benchmark: latency of an unrelated endpoint while a login storm is in progress.
+
+What this script does:
+  - Builds a minimal FastAPI app with a cheap GET /health and a POST /login that
+    verifies a bcrypt hash, served in-process through httpx's ASGI transport so every
+    request shares one event loop, exactly like a single uvicorn worker.
+  - Runs the storm twice: once with bcrypt called inline (the old behaviour) and once
+    through password_hashing.verify_password (dedicated executor).
+  - While the logins run, probes /health at a fixed interval and reports p50/p99.
+
+No database is needed.
+
+Usage:
+  python benchmarks/login_storm_bench.py --logins 40 --probes 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import bcrypt  # noqa: E402
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+import password_hashing  # noqa: E402
+
+
+PASSWORD = "intern-password"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure /health latency during a login storm.")
+    parser.add_argument("--logins", type=int, default=40, help="Concurrent logins in the storm.")
+    parser.add_argument("--probes", type=int, default=200, help="Number of /health probes.")
+    parser.add_argument("--interval-ms", type=float, default=5.0, help="Delay between probes.")
+    return parser.parse_args()
+
+
+def build_app(hashed: str, offloaded: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.post("/login")
+    async def login():
+        if offloaded:
+            ok = await password_hashing.verify_password(PASSWORD, hashed)
+        else:
+            ok = bcrypt.checkpw(PASSWORD.encode("utf-8"), hashed.encode("utf-8"))
+        return {"ok": ok}
+
+    return app
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(label: str, app: FastAPI, args) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def probe_loop():
+            # Latency is measured from when each probe was due, so time spent waiting
+            # for a blocked event loop counts against the probe.
+            latencies = []
+            loop_started = time.perf_counter()
+            for i in range(args.probes):
+                due = loop_started + i * args.interval_ms / 1000
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                await client.get("/health")
+                latencies.append((time.perf_counter() - due) * 1000)
+            return latencies
+
+        idle = await probe_loop()
+        storm_started = time.perf_counter()
+        storm = asyncio.gather(*[client.post("/login") for _ in range(args.logins)])
+        during = await probe_loop()
+        await storm
+        storm_ms = (time.perf_counter() - storm_started) * 1000
+
+    print(f"  {label}")
+    print(
+        f"    idle   p50={statistics.median(idle):8.2f} ms  p99={percentile(idle, 99):8.2f} ms"
+    )
+    print(
+        f"    storm  p50={statistics.median(during):8.2f} ms  p99={percentile(during, 99):8.2f} ms"
+        f"  (storm took {storm_ms:.0f} ms)"
+    )
+
+
+async def main():
+    args = parse_args()
+    hashed = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    # Let the storm queue up instead of tripping the backpressure limit
+    password_hashing.PASSWORD_HASH_MAX_PENDING = max(password_hashing.PASSWORD_HASH_MAX_PENDING, args.logins)
+
+    print("=" * 70)
+    print(f"LOGIN STORM BENCHMARK ({args.logins} logins, {password_hashing.PASSWORD_HASH_WORKERS} hash workers)")
+    print("=" * 70)
+    await run("inline bcrypt", build_app(hashed, offloaded=False), args)
+    await run("executor bcrypt", build_app(hashed, offloaded=True), args)
+    password_hashing.close_password_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
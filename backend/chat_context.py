@@ -0,0 +1,130 @@
+import os
+import re
+from collections import deque
+from typing import Any, Deque, Dict, List
+
+
+# Prompt budget for /chat, in estimated tokens. The newest turns are kept verbatim while
+# they fit; older ones collapse into a short note, and oversized messages are trimmed.
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.environ.get("CHAT_CONTEXT_TOKEN_BUDGET", "6000"))
+CHAT_MESSAGE_MAX_TOKENS = int(os.environ.get("CHAT_MESSAGE_MAX_TOKENS", "1500"))
+CHAT_HISTORY_MAX_MESSAGES = int(os.environ.get("CHAT_HISTORY_MAX_MESSAGES", "20"))
+CHAT_CODE_BLOCK_MAX_LINES = int(os.environ.get("CHAT_CODE_BLOCK_MAX_LINES", "40"))
+
+# Rough chat-template cost of each message on top of its content
+_MESSAGE_OVERHEAD_TOKENS = 4
+_CODE_BLOCK = re.compile(r"```[^\n]*\n(.*?)```", re.DOTALL)
+
+_prompt_tokens: Deque[int] = deque(maxlen=1000)
+_builds = 0
+_dropped_messages = 0
+_truncated_messages = 0
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text and code)."""
+    return (len(text) + 3) // 4
+
+
+def _message_tokens(message: Dict[str, str]) -> int:
+    return estimate_tokens(message["content"]) + _MESSAGE_OVERHEAD_TOKENS
+
+
+def _shorten_code_blocks(text: str) -> str:
+    """Keep the head and tail of long fenced code blocks (pasted tracebacks, whole files)."""
+    head = CHAT_CODE_BLOCK_MAX_LINES * 2 // 3
+    tail = CHAT_CODE_BLOCK_MAX_LINES - head
+
+    def shorten(match: "re.Match[str]") -> str:
+        lines = match.group(1).split("\n")
+        if len(lines) <= CHAT_CODE_BLOCK_MAX_LINES:
+            return match.group(0)
+        omitted = len(lines) - head - tail
+        kept = lines[:head] + [f"... [{omitted} lines omitted] ..."] + lines[-tail:]
+        fence = match.group(0)[: match.group(0).index("\n") + 1]
+        return fence + "\n".join(kept) + "```"
+
+    return _CODE_BLOCK.sub(shorten, text)
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    keep = max_tokens * 4
+    head = keep * 3 // 4
+    return text[:head] + "\n... [truncated] ...\n" + text[-(keep - head):]
+
+
+def compact_message(content: str) -> str:
+    return _truncate(_shorten_code_blocks(content), CHAT_MESSAGE_MAX_TOKENS)
+
+
+def _earlier_turns_note(dropped: List[Dict[str, str]], budget: int) -> str:
+    """One-line stand-in for turns that did not fit: what the student asked about."""
+    topics = []
+    for message in dropped:
+        if message["role"] == "user":
+            first_line = message["content"].strip().split("\n", 1)[0]
+            topics.append(first_line[:80])
+    note = f"(Earlier in this conversation, {len(dropped)} messages were omitted."
+    if topics:
+        note += " The student had asked about: " + "; ".join(topics)
+    return _truncate(note + ")", budget)
+
+
+def build_chat_context(system_prompt: str, history: List[Dict[str, str]], message: str) -> List[Dict[str, str]]:
+    """Build the Groq message list for a new user message within CHAT_CONTEXT_TOKEN_BUDGET.
+
+    Always keeps the system prompt and the new message. History is walked newest first and
+    kept while it fits; whatever is left over is summarised in a short note after the system
+    prompt. Only "user" and "assistant" history entries are accepted.
+    """
+    global _builds, _dropped_messages, _truncated_messages
+    system = {"role": "system", "content": system_prompt}
+    current = {"role": "user", "content": compact_message(message)}
+    truncated = int(current["content"] != message)
+    remaining = CHAT_CONTEXT_TOKEN_BUDGET - _message_tokens(system) - _message_tokens(current)
+
+    eligible = [m for m in history if m["role"] in ("user", "assistant")]
+    dropped = eligible[:max(0, len(eligible) - CHAT_HISTORY_MAX_MESSAGES)]
+    turns = eligible[len(dropped):]
+    kept: List[Dict[str, str]] = []
+    for index in range(len(turns) - 1, -1, -1):
+        compacted = {"role": turns[index]["role"], "content": compact_message(turns[index]["content"])}
+        cost = _message_tokens(compacted)
+        if cost > remaining:
+            dropped = dropped + turns[: index + 1]
+            break
+        truncated += int(compacted["content"] != turns[index]["content"])
+        kept.append(compacted)
+        remaining -= cost
+    kept.reverse()
+
+    messages = [system]
+    if dropped and remaining > _MESSAGE_OVERHEAD_TOKENS + 8:
+        messages.append({"role": "system", "content": _earlier_turns_note(dropped, remaining - _MESSAGE_OVERHEAD_TOKENS)})
+    messages.extend(kept)
+    messages.append(current)
+
+    _builds += 1
+    _dropped_messages += len(dropped)
+    _truncated_messages += truncated
+    _prompt_tokens.append(sum(_message_tokens(m) for m in messages))
+    return messages
+
+
+def chat_context_stats() -> Dict[str, Any]:
+    tokens = sorted(_prompt_tokens)
+
+    def pct(p: float) -> int:
+        return tokens[min(len(tokens) - 1, int(p * len(tokens)))] if tokens else 0
+
+    return {
+        "token_budget": CHAT_CONTEXT_TOKEN_BUDGET,
+        "builds": _builds,
+        "prompt_tokens_p50": pct(0.50),
+        "prompt_tokens_p99": pct(0.99),
+        "prompt_tokens_max": tokens[-1] if tokens else 0,
+        "dropped_messages": _dropped_messages,
+        "truncated_messages": _truncated_messages,
+    }
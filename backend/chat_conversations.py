@@ -0,0 +1,92 @@
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from fastapi import HTTPException
+from pymongo import DESCENDING, ReturnDocument
+
+from chat_context import CHAT_HISTORY_MAX_MESSAGES
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+# Tutor conversations kept server-side so clients send only the new message.
+#   chat_conversations: {id, user_id, created_at, updated_at, message_count}
+#   chat_messages:      {conversation_id, seq, role, content, created_at}  (append-only)
+# Hot conversations keep their recent messages in memory so follow-ups skip the messages
+# query. Each entry records the message_count it reflects and is only used while that still
+# matches the conversation document, so turns stored by other workers are never missed.
+conversation_cache = TTLCache(
+    maxsize=int(os.environ.get("CHAT_CONVERSATION_CACHE_SIZE", "512")),
+    ttl=float(os.environ.get("CHAT_CONVERSATION_CACHE_TTL_SECONDS", "1800")),
+)
+
+
+async def load_conversation(db, conversation_id: str, user_id: str) -> List[Dict[str, str]]:
+    """Recent messages of a conversation, oldest first; 404 unless it belongs to `user_id`."""
+    conversation = await db.chat_conversations.find_one(
+        {"id": conversation_id, "user_id": user_id}, {"_id": 0, "message_count": 1}
+    )
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    cached = conversation_cache.get(conversation_id)
+    if cached is not None and cached["message_count"] == conversation.get("message_count"):
+        return list(cached["messages"])
+
+    recent = await db.chat_messages.find(
+        {"conversation_id": conversation_id},
+        {"_id": 0, "seq": 1, "role": 1, "content": 1},
+    ).sort("seq", DESCENDING).to_list(CHAT_HISTORY_MAX_MESSAGES)
+    messages = [{"role": m["role"], "content": m["content"]} for m in reversed(recent)]
+    # Counted from the stored messages rather than the document: a turn whose messages are
+    # still being inserted must make the next load re-read them
+    stored = recent[0]["seq"] + 1 if recent else 0
+    conversation_cache.set(conversation_id, {"message_count": stored, "messages": messages})
+    return list(messages)
+
+
+async def append_turn(db, conversation_id: str, user_id: str, message: str, reply: str) -> None:
+    """Store a user message and the tutor's reply, creating the conversation on first use."""
+    try:
+        await _append_turn(db, conversation_id, user_id, message, reply)
+    except Exception as exc:
+        # The reply has already been delivered; losing the turn only shortens future context
+        logger.warning("Could not store chat turn for conversation %s: %s", conversation_id, exc)
+
+
+async def _append_turn(db, conversation_id: str, user_id: str, message: str, reply: str) -> None:
+    now = datetime.now(timezone.utc).isoformat()
+    conversation = await db.chat_conversations.find_one_and_update(
+        {"id": conversation_id, "user_id": user_id},
+        {
+            "$inc": {"message_count": 2},
+            "$set": {"updated_at": now},
+            "$setOnInsert": {"created_at": now},
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    # $inc reserved the two sequence numbers, so concurrent turns never collide
+    seq = conversation["message_count"] - 2
+    turn = [{"role": "user", "content": message}, {"role": "assistant", "content": reply}]
+    await db.chat_messages.insert_many([
+        {"conversation_id": conversation_id, "seq": seq + i, **m, "created_at": now}
+        for i, m in enumerate(turn)
+    ])
+
+    cached = conversation_cache.get(conversation_id)
+    if seq == 0 or (cached is not None and cached["message_count"] == seq):
+        # This worker held every earlier message, so the entry stays complete
+        messages = (cached["messages"] if seq else []) + turn
+        conversation_cache.set(conversation_id, {
+            "message_count": seq + 2,
+            "messages": messages[-CHAT_HISTORY_MAX_MESSAGES:],
+        })
+    else:
+        conversation_cache.pop(conversation_id)
+
+
+def conversation_cache_stats() -> Dict[str, Any]:
+    return conversation_cache.stats()
@@ -0,0 +1,660 @@
+import asyncio
+import contextlib
+import functools
+import hashlib
+import logging
+import os
+import pwd
+import resource
+import shutil
+import signal
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import HTTPException
+
+from fair_scheduler import FairScheduler, QueueFull, QueueTimeout
+from http_clients import get_http_client
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+# "wandbox" forwards runs to wandbox.org, "local" runs them in rlimited subprocesses here.
+EXECUTION_BACKEND = os.environ.get("EXECUTION_BACKEND", "wandbox").lower()
+# With the local backend, languages whose toolchain is not installed go to Wandbox.
+EXECUTION_FALLBACK_TO_WANDBOX = os.environ.get("EXECUTION_FALLBACK_TO_WANDBOX", "true").lower() == "true"
+
+EXECUTION_LOCAL_WORKERS = int(os.environ.get("EXECUTION_LOCAL_WORKERS", str(os.cpu_count() or 1)))
+EXECUTION_CPU_SECONDS = int(os.environ.get("EXECUTION_CPU_SECONDS", "5"))
+EXECUTION_WALL_SECONDS = float(os.environ.get("EXECUTION_WALL_SECONDS", "10"))
+EXECUTION_MEMORY_MB = int(os.environ.get("EXECUTION_MEMORY_MB", "256"))
+EXECUTION_OUTPUT_BYTES = int(os.environ.get("EXECUTION_OUTPUT_BYTES", str(64 * 1024)))
+# RLIMIT_NPROC counts every process and thread of the uid the program runs as, so this is
+# shared by all concurrent runs (a JVM alone starts a few dozen threads).
+EXECUTION_MAX_PROCESSES = int(os.environ.get("EXECUTION_MAX_PROCESSES", "256"))
+EXECUTION_PYTHON = os.environ.get("EXECUTION_PYTHON", "python3")
+_PRLIMIT = shutil.which("prlimit")
+
+# Local runs execute as this dedicated unprivileged account (name or uid), in fresh network,
+# PID and mount namespaces: no network, no view of the API's processes, and only what the
+# account's own permissions allow on disk. The API must run as root to switch to it, and the
+# account must not be able to read the secrets file. Without all of that the local backend
+# refuses to run anything.
+EXECUTION_RUNNER_USER = os.environ.get("EXECUTION_RUNNER_USER", "")
+_UNSHARE = shutil.which("unshare")
+_SETPRIV = shutil.which("setpriv")
+_SECRETS_FILE = Path(__file__).parent / ".env"
+
+# How long to wait for a killed program's pipes to close and its exit status to arrive
+_REAP_SECONDS = 2.0
+
+# Compilers need more headroom than the programs they build.
+_COMPILE_CPU_SECONDS = 20
+_COMPILE_WALL_SECONDS = 30.0
+_COMPILE_MEMORY_MB = 1024
+
+
+# Compiler map cache. Refreshed every WANDBOX_COMPILER_TTL_SECONDS by a background task
+# started at startup; a fallback map is retried after WANDBOX_COMPILER_RETRY_SECONDS.
+WANDBOX_COMPILER_TTL_SECONDS = float(os.environ.get("WANDBOX_COMPILER_TTL_SECONDS", str(6 * 3600)))
+WANDBOX_COMPILER_RETRY_SECONDS = float(os.environ.get("WANDBOX_COMPILER_RETRY_SECONDS", "60"))
+
+_wandbox_compiler_map: dict = {}
+_compiler_map_is_fallback = False
+_compiler_map_expires_at = 0.0
+_compiler_map_refresh: "Optional[asyncio.Task[dict]]" = None
+_compiler_map_refresher_task: "Optional[asyncio.Task[None]]" = None
+
+# Preferred compiler prefixes per language (newest first)
+_COMPILER_PREFS = {
+    "python":     ["cpython-3.13", "cpython-3.12", "cpython-3.11", "cpython-3.10"],
+    "javascript": ["nodejs-22", "nodejs-20", "nodejs-18"],
+    "java":       ["openjdk-21", "openjdk-17"],
+    "c":          ["gcc-14", "gcc-13", "gcc-12", "gcc-11"],
+    "cpp":        ["gcc-14", "gcc-13", "gcc-12", "gcc-11"],
+}
+
+_COMPILER_FALLBACK = {
+    "python":     "cpython-3.12.5",
+    "javascript": "nodejs-20.11.0",
+    "java":       "openjdk-21.0.1",
+    "c":          "gcc-13.2.0",
+    "cpp":        "gcc-13.2.0",
+}
+
+# Local toolchains. `limit_address_space` is off for runtimes that reserve large virtual
+# address ranges up front (V8, the JVM); their heap is capped with a runtime flag instead.
+_LOCAL_TOOLCHAINS: Dict[str, Dict[str, Any]] = {
+    "python": {
+        "file": "main.py",
+        "run": [EXECUTION_PYTHON, "main.py"],
+        "limit_address_space": True,
+    },
+    "javascript": {
+        "file": "main.js",
+        "run": ["node", f"--max-old-space-size={EXECUTION_MEMORY_MB}", "main.js"],
+        "limit_address_space": False,
+    },
+    "java": {
+        "file": "Main.java",
+        "compile": ["javac", "-J-Xmx512m", "Main.java"],
+        "run": ["java", f"-Xmx{EXECUTION_MEMORY_MB}m", "-cp", ".", "Main"],
+        "limit_address_space": False,
+    },
+    "c": {
+        "file": "main.c",
+        "compile": ["gcc", "-O2", "-o", "main", "main.c", "-lm"],
+        "run": ["./main"],
+        "limit_address_space": True,
+    },
+    "cpp": {
+        "file": "main.cpp",
+        "compile": ["g++", "-O2", "-o", "main", "main.cpp"],
+        "run": ["./main"],
+        "limit_address_space": True,
+    },
+}
+
+_local_slots: Optional[asyncio.Semaphore] = None
+
+# Admission control for outbound/local runs: a global cap on concurrent executions with
+# per-user fair queues. Callers fail fast (429/503) rather than waiting on the upstream.
+execution_scheduler = FairScheduler(
+    max_concurrency=int(os.environ.get("EXECUTION_MAX_CONCURRENCY", "16")),
+    max_queue_per_key=int(os.environ.get("EXECUTION_MAX_QUEUE_PER_USER", "4")),
+    max_queue=int(os.environ.get("EXECUTION_MAX_QUEUE", "200")),
+    max_wait_seconds=float(os.environ.get("EXECUTION_MAX_QUEUE_WAIT_SECONDS", "5")),
+)
+
+# Opt-in cache of finished runs keyed on (language, compiler, sha256(code), sha256(stdin)).
+# Only enable it while student programs are deterministic (no randomness or clock reads).
+EXECUTION_CACHE_ENABLED = os.environ.get("EXECUTION_CACHE_ENABLED", "false").lower() == "true"
+execution_cache = TTLCache(
+    maxsize=int(os.environ.get("EXECUTION_CACHE_SIZE", "2048")),
+    ttl=float(os.environ.get("EXECUTION_CACHE_TTL_SECONDS", "3600")),
+)
+
+# /execute/batch: cases per request, and how many of them run at once. Concurrency is kept
+# within the per-user queue so a batch never trips its own 429.
+EXECUTION_BATCH_MAX_CASES = int(os.environ.get("EXECUTION_BATCH_MAX_CASES", "20"))
+EXECUTION_BATCH_CONCURRENCY = max(1, min(
+    int(os.environ.get("EXECUTION_BATCH_CONCURRENCY", "4")),
+    execution_scheduler.max_queue_per_key,
+))
+
+
+async def _fetch_compiler_map() -> dict:
+    global _wandbox_compiler_map, _compiler_map_is_fallback, _compiler_map_expires_at
+    try:
+        resp = await get_http_client("wandbox").get("/api/list.json", timeout=10)
+        if resp.status_code != 200:
+            raise ValueError(f"Wandbox list returned {resp.status_code}")
+        compiler_names = [c["name"] for c in resp.json()]
+
+        result = {}
+        for lang, prefs in _COMPILER_PREFS.items():
+            for pref in prefs:
+                match = next((n for n in compiler_names if n.startswith(pref)), None)
+                if match:
+                    result[lang] = match
+                    break
+            if lang not in result:
+                result[lang] = _COMPILER_FALLBACK[lang]
+
+        _wandbox_compiler_map = result
+        _compiler_map_is_fallback = False
+        _compiler_map_expires_at = time.monotonic() + WANDBOX_COMPILER_TTL_SECONDS
+        logger.info(f"Wandbox compilers selected: {_wandbox_compiler_map}")
+    except Exception as exc:
+        # Keep serving a previously fetched map; only use the fallback when there is none.
+        if not _wandbox_compiler_map:
+            logger.warning(f"Wandbox compiler list fetch failed ({exc}), using fallback")
+            _wandbox_compiler_map = _COMPILER_FALLBACK.copy()
+            _compiler_map_is_fallback = True
+        else:
+            logger.warning(f"Wandbox compiler list refresh failed ({exc}), keeping current map")
+        _compiler_map_expires_at = time.monotonic() + WANDBOX_COMPILER_RETRY_SECONDS
+
+    return _wandbox_compiler_map
+
+
+def _refresh_compiler_map() -> "asyncio.Task[dict]":
+    """Start a fetch unless one is already in flight; every caller shares the same task."""
+    global _compiler_map_refresh
+    if _compiler_map_refresh is None or _compiler_map_refresh.done():
+        _compiler_map_refresh = asyncio.ensure_future(_fetch_compiler_map())
+    return _compiler_map_refresh
+
+
+async def get_wandbox_compiler_map() -> dict:
+    """Return the Wandbox compiler map.
+
+    On a cold start all callers wait on one shared fetch. Afterwards an expired map is
+    served stale while a single background fetch revalidates it.
+    """
+    if not _wandbox_compiler_map:
+        # shield: a cancelled request must not cancel the fetch other callers wait on
+        return await asyncio.shield(_refresh_compiler_map())
+    if time.monotonic() >= _compiler_map_expires_at:
+        _refresh_compiler_map()
+    return _wandbox_compiler_map
+
+
+async def _compiler_map_refresher() -> None:
+    while True:
+        await _refresh_compiler_map()
+        await asyncio.sleep(max(1.0, _compiler_map_expires_at - time.monotonic()))
+
+
+def start_compiler_map_refresher() -> None:
+    global _compiler_map_refresher_task
+    if _compiler_map_refresher_task is None:
+        _compiler_map_refresher_task = asyncio.create_task(_compiler_map_refresher())
+
+
+async def stop_compiler_map_refresher() -> None:
+    global _compiler_map_refresher_task
+    task, _compiler_map_refresher_task = _compiler_map_refresher_task, None
+    if task is not None:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+
+def compiler_map_stats() -> Dict[str, Any]:
+    return {
+        "compilers": _wandbox_compiler_map,
+        "fallback": _compiler_map_is_fallback,
+        "expires_in_seconds": round(max(0.0, _compiler_map_expires_at - time.monotonic()), 1),
+        "refreshing": _compiler_map_refresh is not None and not _compiler_map_refresh.done(),
+    }
+
+
+async def run_wandbox(language: str, compiler: str, code: str, stdin: str = "") -> Dict[str, Any]:
+    """Run code via Wandbox (server-side, no CORS, no API key needed)."""
+    # Build Wandbox payload — use file extension so GCC knows C vs C++
+    if language == "c":
+        payload = {"compiler": compiler, "codes": [{"file": "main.c", "code": code}]}
+    elif language == "java":
+        payload = {"compiler": compiler, "codes": [{"file": "Main.java", "code": code}]}
+    else:
+        payload = {"compiler": compiler, "code": code}
+    if stdin:
+        payload["stdin"] = stdin
+
+    try:
+        resp = await get_http_client("wandbox").post(
+            "/api/compile.json",
+            json=payload,
+            headers={"Content-Type": "application/json"},
+        )
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail="Code execution timed out")
+    except httpx.RequestError as exc:
+        raise HTTPException(status_code=502, detail=f"Failed to reach execution server: {exc}")
+    if resp.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"Execution service error: {resp.status_code}")
+
+    result = resp.json()
+
+    stdout = result.get("program_output", "")
+
+    stderr_parts = []
+    if result.get("compiler_error"):
+        stderr_parts.append(result["compiler_error"])
+    if result.get("program_error"):
+        stderr_parts.append(result["program_error"])
+    if result.get("signal"):
+        stderr_parts.append(f"Killed by signal: {result['signal']}")
+    stderr = "\n".join(stderr_parts)
+
+    status_str = result.get("status", "")
+    try:
+        exit_code = int(status_str)
+    except (ValueError, TypeError):
+        exit_code = 1 if stderr else 0
+
+    return {
+        "stdout": stdout,
+        "stderr": stderr,
+        "code": exit_code,
+        "signal": result.get("signal") or None,
+        "timed_out": False,
+    }
+
+
+def local_toolchain_available(language: str) -> bool:
+    toolchain = _LOCAL_TOOLCHAINS.get(language)
+    if not toolchain:
+        return False
+    binaries = [toolchain["run"][0]] + ([toolchain["compile"][0]] if "compile" in toolchain else [])
+    return all(b.startswith("./") or shutil.which(b) for b in binaries)
+
+
+def _readable_by(path: Path, uid: int, gid: int) -> bool:
+    info = path.stat()
+    if info.st_uid == uid:
+        return bool(info.st_mode & 0o400)
+    if info.st_gid == gid:
+        return bool(info.st_mode & 0o040)
+    return bool(info.st_mode & 0o004)
+
+
+def _resolve_runner() -> Tuple[Optional[Tuple[int, int]], Optional[str]]:
+    """(uid, gid) that local runs switch to, or why local execution is refused."""
+    if not EXECUTION_RUNNER_USER:
+        return None, "EXECUTION_RUNNER_USER is not set"
+    try:
+        if EXECUTION_RUNNER_USER.isdigit():
+            entry = pwd.getpwuid(int(EXECUTION_RUNNER_USER))
+        else:
+            entry = pwd.getpwnam(EXECUTION_RUNNER_USER)
+    except KeyError:
+        return None, f"unknown EXECUTION_RUNNER_USER {EXECUTION_RUNNER_USER!r}"
+    if entry.pw_uid == 0:
+        return None, "EXECUTION_RUNNER_USER must not be root"
+    if os.geteuid() != 0:
+        return None, "the API must run as root to switch to EXECUTION_RUNNER_USER"
+    if not (_UNSHARE and _SETPRIV):
+        return None, "util-linux unshare and setpriv are required"
+    if _SECRETS_FILE.exists() and _readable_by(_SECRETS_FILE, entry.pw_uid, entry.pw_gid):
+        return None, f"{_SECRETS_FILE} is readable by EXECUTION_RUNNER_USER (chmod 600 it)"
+    return (entry.pw_uid, entry.pw_gid), None
+
+
+_runner, _local_sandbox_problem = _resolve_runner()
+
+
+def local_sandbox_problem() -> Optional[str]:
+    """Why the local backend is refusing runs, or None when its isolation is in place."""
+    return _local_sandbox_problem
+
+
+def _sandbox_limits(cpu_seconds: int, memory_mb: Optional[int]):
+    def apply():
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (EXECUTION_OUTPUT_BYTES, EXECUTION_OUTPUT_BYTES))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        resource.setrlimit(resource.RLIMIT_NPROC, (EXECUTION_MAX_PROCESSES, EXECUTION_MAX_PROCESSES))
+        if memory_mb:
+            memory = memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    return apply
+
+
+def _sandboxed_argv(argv: List[str], cpu_seconds: int, memory_mb: Optional[int]) -> Tuple[List[str], Any]:
+    """Command line and preexec_fn running `argv` isolated and under the sandbox rlimits.
+
+    `unshare` gives the program its own network, PID and mount namespaces and `setpriv`
+    drops to the runner account. A shell is PID 1 of the namespace, so everything the
+    program forks dies with it, and the program itself keeps normal signal handling (PID 1
+    ignores default-action signals); the shell reports a signal death as 128+N. The rlimits are applied by util-linux `prlimit`, which sets them and
+    execs the program. Without it they are applied in a preexec_fn, which Python documents
+    as unsafe once the process has threads (the bcrypt and default executors): a fork taken
+    while another thread holds a lock can deadlock the child before it execs.
+    """
+    uid, gid = _runner
+    isolate = [
+        _UNSHARE, "--net", "--pid", "--kill-child", "--mount-proc", "--",
+        _SETPRIV, f"--reuid={uid}", f"--regid={gid}", "--clear-groups", "--no-new-privs", "--",
+    ]
+    argv = ["/bin/sh", "-c", '"$@"; exit $?', "sandbox", *argv]
+    if _PRLIMIT:
+        limits = [
+            f"--cpu={cpu_seconds}:{cpu_seconds + 1}",
+            f"--fsize={EXECUTION_OUTPUT_BYTES}",
+            "--core=0",
+            f"--nproc={EXECUTION_MAX_PROCESSES}",
+        ]
+        if memory_mb:
+            limits.append(f"--as={memory_mb * 1024 * 1024}")
+        return [*isolate, _PRLIMIT, *limits, "--", *argv], None
+    return [*isolate, *argv], _sandbox_limits(cpu_seconds, memory_mb)
+
+
+async def _read_capped(
+    stream: asyncio.StreamReader, buffer: bytearray, limit: int, on_overflow: Callable[[], None]
+) -> bool:
+    """Read into `buffer` until EOF; returns True if the stream went past `limit` bytes.
+
+    Calls `on_overflow` as soon as the limit is crossed and discards the rest, so a full
+    pipe never blocks the writer (or this reader) while the program is being killed.
+    """
+    truncated = False
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            return truncated
+        if truncated:
+            continue
+        remaining = limit - len(buffer)
+        buffer.extend(chunk[:remaining])
+        if len(chunk) > remaining:
+            truncated = True
+            on_overflow()
+
+
+async def _drain(stream: asyncio.StreamReader) -> None:
+    while await stream.read(65536):
+        pass
+
+
+def _kill_group(proc: asyncio.subprocess.Process) -> None:
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def _reap(proc: asyncio.subprocess.Process) -> None:
+    """Wait for a killed program's exit status, draining its pipes so their EOF can arrive."""
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(_drain(proc.stdout), _drain(proc.stderr), proc.wait()),
+            timeout=_REAP_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        # A descendant that left the process group can hold the pipes open; don't wait on it
+        logger.warning("Sandboxed process %s still not reaped %.0fs after SIGKILL", proc.pid, _REAP_SECONDS)
+
+
+async def _feed_stdin(writer: Optional[asyncio.StreamWriter], data: str) -> bool:
+    if writer is None:
+        return False
+    try:
+        writer.write(data.encode("utf-8"))
+        await writer.drain()
+        writer.close()
+    except (BrokenPipeError, ConnectionResetError):
+        # The program exited (or closed stdin) without reading all of its input
+        pass
+    return False
+
+
+async def _run_sandboxed(
+    argv: List[str],
+    cwd: str,
+    cpu_seconds: int,
+    wall_seconds: float,
+    memory_mb: Optional[int],
+    stdin: str = "",
+) -> Dict[str, Any]:
+    argv, preexec_fn = _sandboxed_argv(argv, cpu_seconds, memory_mb)
+    proc = await asyncio.create_subprocess_exec(
+        *argv,
+        cwd=cwd,
+        stdin=asyncio.subprocess.PIPE if stdin else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env={
+            "PATH": os.environ.get("PATH", "/usr/bin:/bin"),
+            "HOME": cwd,
+            "LANG": "C.UTF-8",
+            "OPENBLAS_NUM_THREADS": "1",
+        },
+        start_new_session=True,
+        preexec_fn=preexec_fn,
+    )
+    stdout, stderr = bytearray(), bytearray()
+    timed_out = truncated = False
+    kill = functools.partial(_kill_group, proc)
+    try:
+        # The wall limit covers the exit too: a program that closes its output and keeps
+        # running must not outlive it
+        truncated = any((await asyncio.wait_for(
+            asyncio.gather(
+                _read_capped(proc.stdout, stdout, EXECUTION_OUTPUT_BYTES, kill),
+                _read_capped(proc.stderr, stderr, EXECUTION_OUTPUT_BYTES, kill),
+                _feed_stdin(proc.stdin, stdin),
+                proc.wait(),
+            ),
+            timeout=wall_seconds,
+        ))[:2])
+    except asyncio.TimeoutError:
+        timed_out = True
+    # Always, so processes the program forked don't keep running once its slot is released
+    _kill_group(proc)
+    await _reap(proc)
+
+    stderr_text = stderr.decode("utf-8", errors="replace")
+    notes = []
+    if truncated:
+        notes.append(f"Output limit exceeded ({EXECUTION_OUTPUT_BYTES} bytes)")
+    if timed_out:
+        notes.append(f"Time limit exceeded ({wall_seconds:g}s)")
+    signal_name = None
+    exit_code = proc.returncode
+    if exit_code is not None and exit_code < 0:
+        exit_code = 128 - exit_code
+    if exit_code is not None and exit_code > 128 and exit_code - 128 in signal.valid_signals():
+        # Killed here (negative returncode) or inside the sandbox (the init shell's 128+N)
+        signal_name = signal.Signals(exit_code - 128).name
+        notes.append(f"Killed by signal: {signal_name}")
+    return {
+        "stdout": stdout.decode("utf-8", errors="replace"),
+        "stderr": "\n".join(([stderr_text] if stderr_text else []) + notes),
+        "code": exit_code,
+        "signal": signal_name,
+        "timed_out": timed_out,
+    }
+
+
+async def run_local(language: str, code: str, stdin: str = "") -> Dict[str, Any]:
+    """Compile (if needed) and run code in an isolated, rlimited subprocess on this host.
+
+    Runs as EXECUTION_RUNNER_USER without network access (see _sandboxed_argv), bounded in
+    CPU, memory, processes, output and wall time. Refused with a 503 until that isolation
+    is configured.
+    """
+    global _local_slots
+    if _local_sandbox_problem:
+        raise HTTPException(status_code=503, detail="Local code execution is not available on this server")
+    toolchain = _LOCAL_TOOLCHAINS.get(language)
+    if not toolchain:
+        raise HTTPException(status_code=400, detail=f"Unsupported language: {language}")
+    if _local_slots is None:
+        _local_slots = asyncio.Semaphore(EXECUTION_LOCAL_WORKERS)
+
+    async with _local_slots:
+        with tempfile.TemporaryDirectory(prefix="exec-") as workdir:
+            source = os.path.join(workdir, toolchain["file"])
+            with open(source, "w", encoding="utf-8") as f:
+                f.write(code)
+            # The runner account builds and runs in here; nobody else can look in
+            for path in (workdir, source):
+                os.chown(path, *_runner)
+            if "compile" in toolchain:
+                compiled = await _run_sandboxed(
+                    toolchain["compile"],
+                    workdir,
+                    _COMPILE_CPU_SECONDS,
+                    _COMPILE_WALL_SECONDS,
+                    _COMPILE_MEMORY_MB if toolchain["limit_address_space"] else None,
+                )
+                if compiled["code"] != 0:
+                    # Report compiler diagnostics the way Wandbox does: no program output
+                    compiled["stderr"] = compiled["stderr"] or compiled["stdout"]
+                    compiled["stdout"] = ""
+                    return compiled
+            return await _run_sandboxed(
+                toolchain["run"],
+                workdir,
+                EXECUTION_CPU_SECONDS,
+                EXECUTION_WALL_SECONDS,
+                EXECUTION_MEMORY_MB if toolchain["limit_address_space"] else None,
+                stdin,
+            )
+
+
+async def resolve_compiler(language: str) -> Tuple[str, str]:
+    """Pick the backend for a language and the compiler it will use: (backend, compiler)."""
+    if EXECUTION_BACKEND == "local":
+        if not _local_sandbox_problem and local_toolchain_available(language):
+            return "local", f"local-{language}"
+        if not EXECUTION_FALLBACK_TO_WANDBOX:
+            if _local_sandbox_problem:
+                raise HTTPException(status_code=503, detail="Local code execution is not available on this server")
+            raise HTTPException(status_code=400, detail=f"Language not available on this server: {language}")
+    compiler_map = await get_wandbox_compiler_map()
+    compiler = compiler_map.get(language)
+    if not compiler:
+        raise HTTPException(status_code=400, detail=f"Unsupported language: {language}")
+    return "wandbox", compiler
+
+
+async def run_code(language: str, code: str, client_key: str = "anonymous", stdin: str = "") -> Dict[str, Any]:
+    """Run code on the configured backend, answering from the result cache when enabled.
+
+    Runs that miss the cache wait for a slot in the execution scheduler, queued fairly
+    per `client_key` (a user id or client IP).
+
+    Returns stdout/stderr/code (the /execute response shape) plus `signal` and
+    `timed_out` for callers that need to know how the run ended, and `cache`
+    ("hit", "miss" or "disabled").
+    """
+    backend, compiler = await resolve_compiler(language)
+    key = (
+        language,
+        compiler,
+        hashlib.sha256(code.encode("utf-8")).hexdigest(),
+        hashlib.sha256(stdin.encode("utf-8")).hexdigest(),
+    )
+    if EXECUTION_CACHE_ENABLED:
+        cached = execution_cache.get(key)
+        if cached is not None:
+            return {**cached, "cache": "hit"}
+
+    try:
+        async with execution_scheduler.slot(client_key):
+            if backend == "local":
+                result = await run_local(language, code, stdin)
+            else:
+                result = await run_wandbox(language, compiler, code, stdin)
+    except QueueFull:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many code runs in progress. Wait for your previous run to finish.",
+            headers={"Retry-After": "2"},
+        )
+    except QueueTimeout:
+        raise HTTPException(
+            status_code=503,
+            detail="The code runner is busy. Please try again in a few seconds.",
+            headers={"Retry-After": "5"},
+        )
+
+    # A run that hit the time limit, was killed or never reported an exit status may succeed
+    # next time; never replay it.
+    if EXECUTION_CACHE_ENABLED and not result["timed_out"] and not result["signal"] and result["code"] is not None:
+        execution_cache.set(key, result)
+    return {**result, "cache": "miss" if EXECUTION_CACHE_ENABLED else "disabled"}
+
+
+def normalize_output(text: str) -> str:
+    """Output as compared against expected output: LF newlines, no trailing whitespace."""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).rstrip("\n")
+
+
+async def run_test_cases(
+    language: str,
+    code: str,
+    cases: List[Tuple[str, str]],
+    client_key: str = "anonymous",
+) -> List[Dict[str, Any]]:
+    """Run one program against (stdin, expected_output) cases, EXECUTION_BATCH_CONCURRENCY at a time.
+
+    The language is resolved once up front so an unsupported one fails the whole batch.
+    Per-case failures (queue full, upstream errors) are reported on that case only.
+    """
+    if len(cases) > EXECUTION_BATCH_MAX_CASES:
+        raise HTTPException(status_code=400, detail=f"At most {EXECUTION_BATCH_MAX_CASES} test cases per batch")
+    await resolve_compiler(language)
+    slots = asyncio.Semaphore(EXECUTION_BATCH_CONCURRENCY)
+
+    async def run_case(index: int, stdin: str, expected: str) -> Dict[str, Any]:
+        async with slots:
+            try:
+                result = await run_code(language, code, client_key=client_key, stdin=stdin)
+            except HTTPException as e:
+                return {
+                    "index": index,
+                    "passed": False,
+                    "run": {"stdout": "", "stderr": "", "code": None},
+                    "error": e.detail,
+                }
+        passed = result["code"] == 0 and normalize_output(result["stdout"]) == normalize_output(expected)
+        return {
+            "index": index,
+            "passed": passed,
+            "run": {"stdout": result["stdout"], "stderr": result["stderr"], "code": result["code"]},
+            "cache": result["cache"],
+        }
+
+    return list(await asyncio.gather(*[
+        run_case(index, stdin, expected) for index, (stdin, expected) in enumerate(cases)
+    ]))
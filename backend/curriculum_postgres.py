@@ -1,15 +1,19 @@
 import json
 import logging
+import os
 import uuid
 from datetime import datetime, timezone
 from typing import Any, Callable, Dict, List, Optional
 
 import httpx
 from asyncpg import UniqueViolationError
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel, Field
 
+from http_caching import conditional_response, make_etag
+from http_clients import get_http_client
 from postgres import get_postgres_pool
+from ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -72,6 +76,32 @@ CURRICULUM_SYSTEM_PROMPT = (
 )
 
 
+# Built /pg-curriculum/published responses, keyed by (course_slug, version_id, course
+# updated_at). A version's days never change once written, and the course row is part of
+# the key, so an entry only goes stale when a newer version is published or the course is
+# edited. published_versions remembers each course's current key so steady-state loads
+# skip Postgres; when it expires, two small queries re-validate it before any day rows are
+# read. approve_proposal and bootstrap_course drop both for the course; other workers see
+# the new version once their pointer expires.
+published_versions = TTLCache(
+    maxsize=int(os.environ.get("PG_CURRICULUM_CACHE_SIZE", "32")),
+    ttl=float(os.environ.get("PG_CURRICULUM_VERSION_TTL_SECONDS", "60")),
+)
+published_curriculum_cache = TTLCache(
+    maxsize=int(os.environ.get("PG_CURRICULUM_CACHE_SIZE", "32")),
+    ttl=float(os.environ.get("PG_CURRICULUM_CACHE_TTL_SECONDS", str(24 * 3600))),
+)
+
+
+def invalidate_published_curriculum(course_slug: str) -> None:
+    published_versions.pop(course_slug)
+    published_curriculum_cache.pop_where(lambda key: key[0] == course_slug)
+
+
+def published_curriculum_stats() -> Dict[str, Any]:
+    return {"versions": published_versions.stats(), "responses": published_curriculum_cache.stats()}
+
+
 def _require_admin(user: dict) -> None:
     if user.get("role") != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
@@ -224,8 +254,14 @@ def create_curriculum_postgres_router(
         except Exception as exc:
             return {"configured": False, "connected": False, "detail": str(exc)}
 
-    @router.get("/pg-curriculum/published")
-    async def get_published_curriculum(course_slug: str = "aiml", user=Depends(get_current_user)):
+    async def load_published_curriculum(course_slug: str) -> Dict[str, Any]:
+        """Cache entry for a course's published curriculum: the response and its days by number."""
+        key = published_versions.get(course_slug)
+        if key is not None:
+            entry = published_curriculum_cache.get(key)
+            if entry is not None:
+                return entry
+
         pool = get_postgres_pool()
         async with pool.acquire() as conn:
             course = await conn.fetchrow("SELECT * FROM courses WHERE slug = $1", course_slug)
@@ -240,16 +276,52 @@ def create_curriculum_postgres_router(
                 """,
                 course["id"],
             )
-            if not version:
-                return {"course": dict(course), "version": None, "days": []}
-            rows = await conn.fetch(
-                "SELECT * FROM curriculum_days WHERE version_id = $1 ORDER BY day_number",
-                version["id"],
-            )
-            return {"course": dict(course), "version": dict(version), "days": [_row_to_day(row) for row in rows]}
+            key = (course_slug, version["id"] if version else None, course.get("updated_at"))
+            published_versions.set(course_slug, key)
+            entry = published_curriculum_cache.get(key)
+            if entry is not None:
+                return entry
+            rows = []
+            if version:
+                rows = await conn.fetch(
+                    "SELECT * FROM curriculum_days WHERE version_id = $1 ORDER BY day_number",
+                    version["id"],
+                )
+
+        days = [_row_to_day(row) for row in rows]
+        entry = {
+            "response": {"course": dict(course), "version": dict(version) if version else None, "days": days},
+            "days_by_number": {day["day"]: day for day in days},
+            "etag": make_etag(*key[1:]),
+        }
+        published_curriculum_cache.set(key, entry)
+        return entry
+
+    @router.get("/pg-curriculum/published")
+    async def get_published_curriculum(
+        request: Request, response: Response, course_slug: str = "aiml", user=Depends(get_current_user)
+    ):
+        entry = await load_published_curriculum(course_slug)
+        not_modified = conditional_response(request, response, entry["etag"])
+        if not_modified:
+            return not_modified
+        return entry["response"]
 
     @router.get("/pg-curriculum/days/{day_number}")
-    async def get_published_curriculum_day(day_number: int, course_slug: str = "aiml", user=Depends(get_current_user)):
+    async def get_published_curriculum_day(
+        day_number: int, request: Request, response: Response, course_slug: str = "aiml", user=Depends(get_current_user)
+    ):
+        key = published_versions.get(course_slug)
+        entry = published_curriculum_cache.get(key) if key is not None else None
+        # A day missing from the cached version falls through to the query below, which
+        # answers from the newest published version that has it
+        day = entry["days_by_number"].get(day_number) if entry is not None else None
+        if day is not None:
+            not_modified = conditional_response(request, response, make_etag(key[1], day_number))
+            if not_modified:
+                return not_modified
+            return day
+
         pool = get_postgres_pool()
         async with pool.acquire() as conn:
             row = await conn.fetchrow(
@@ -267,7 +339,10 @@ def create_curriculum_postgres_router(
             )
             if not row:
                 raise HTTPException(status_code=404, detail="Curriculum day not found")
-            return _row_to_day(row)
+        not_modified = conditional_response(request, response, make_etag(row["version_id"], day_number))
+        if not_modified:
+            return not_modified
+        return _row_to_day(row)
 
     @router.post("/admin/pg-curriculum/bootstrap-course")
     async def bootstrap_course(data: CourseBootstrap, user=Depends(get_current_user)):
@@ -304,6 +379,8 @@ def create_curriculum_postgres_router(
                 version_id = None
                 if data.days:
                     version_id = await _create_version_from_days(conn, course_id, data.days, user.get("id"), publish=data.publish)
+        # After the commit, so the next load reads the new version
+        invalidate_published_curriculum(data.slug)
         return {"message": "Course saved", "course_id": str(course_id), "version_id": str(version_id) if version_id else None}
 
     @router.post("/admin/pg-curriculum/proposals")
@@ -385,6 +462,8 @@ def create_curriculum_postgres_router(
                     datetime.now(timezone.utc),
                     decision.reason,
                 )
+                course_slug = await conn.fetchval("SELECT slug FROM courses WHERE id = $1", proposal["course_id"])
+        invalidate_published_curriculum(course_slug)
         return {"message": "Proposal approved and published", "version_id": str(version_id)}
 
     @router.post("/admin/pg-curriculum/proposals/{proposal_id}/reject")
@@ -458,25 +537,24 @@ def create_curriculum_postgres_router(
         )
 
         try:
-            async with httpx.AsyncClient(timeout=300.0) as client:
-                resp = await client.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {openrouter_api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": curriculum_ai_model,
-                        "messages": [
-                            {"role": "system", "content": CURRICULUM_SYSTEM_PROMPT},
-                            {"role": "user", "content": user_message},
-                        ],
-                        "max_tokens": 64000,
-                        "temperature": 0.3,
-                    },
-                )
-                resp.raise_for_status()
-                ai_result = resp.json()
+            resp = await get_http_client("openrouter").post(
+                "/api/v1/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {openrouter_api_key}",
+                    "Content-Type": "application/json",
+                },
+                json={
+                    "model": curriculum_ai_model,
+                    "messages": [
+                        {"role": "system", "content": CURRICULUM_SYSTEM_PROMPT},
+                        {"role": "user", "content": user_message},
+                    ],
+                    "max_tokens": 64000,
+                    "temperature": 0.3,
+                },
+            )
+            resp.raise_for_status()
+            ai_result = resp.json()
         except httpx.TimeoutException:
             raise HTTPException(status_code=504, detail="AI provider timed out. Try a shorter instruction or try again later.")
         except httpx.HTTPStatusError as exc:
@@ -0,0 +1,127 @@
+import asyncio
+import contextlib
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict
+
+
+class QueueFull(Exception):
+    """The caller's own queue (or the global queue) is at capacity."""
+
+
+class QueueTimeout(Exception):
+    """The caller waited longer than the scheduler's max wait for a slot."""
+
+
+class FairScheduler:
+    """Global concurrency cap with round-robin admission across per-key FIFO queues.
+
+    While a slot is free and nobody is waiting, callers run immediately. Otherwise each
+    key (a user or client IP) queues separately and freed slots go to the keys in turn,
+    so one user's burst cannot starve everyone else. Waiting is bounded: a full queue
+    fails fast with QueueFull, a wait past `max_wait_seconds` with QueueTimeout.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue_per_key: int, max_queue: int, max_wait_seconds: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue_per_key = max_queue_per_key
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self._running = 0
+        self._queued = 0
+        self._queues: Dict[str, Deque[asyncio.Future]] = {}
+        self._rotation: Deque[str] = deque()
+        self._waits: Deque[float] = deque(maxlen=1000)
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+
+    @contextlib.asynccontextmanager
+    async def slot(self, key: str) -> AsyncIterator[None]:
+        await self._acquire(key)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, key: str) -> None:
+        if self._running < self.max_concurrency and not self._rotation:
+            self._admit()
+            self._waits.append(0.0)
+            return
+
+        queue = self._queues.get(key)
+        if self._queued >= self.max_queue or (queue is not None and len(queue) >= self.max_queue_per_key):
+            self.rejected_full += 1
+            raise QueueFull()
+        if queue is None:
+            queue = self._queues[key] = deque()
+            self._rotation.append(key)
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        self._queued += 1
+        enqueued_at = time.monotonic()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                self._discard(key, waiter)
+                self.rejected_timeout += 1
+                raise QueueTimeout()
+        except asyncio.CancelledError:
+            if waiter.done():
+                # The slot was handed over just as the caller went away; pass it on
+                self._release()
+            else:
+                self._discard(key, waiter)
+            raise
+        self._waits.append(time.monotonic() - enqueued_at)
+
+    def _admit(self) -> None:
+        self._running += 1
+        self.admitted += 1
+
+    def _discard(self, key: str, waiter: asyncio.Future) -> None:
+        waiter.cancel()
+        queue = self._queues.get(key)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            self._queued -= 1
+            if not queue:
+                del self._queues[key]
+                self._rotation.remove(key)
+
+    def _release(self) -> None:
+        self._running -= 1
+        while self._running < self.max_concurrency and self._rotation:
+            key = self._rotation.popleft()
+            queue = self._queues[key]
+            waiter = queue.popleft()
+            self._queued -= 1
+            if queue:
+                self._rotation.append(key)
+            else:
+                del self._queues[key]
+            if waiter.done():
+                continue
+            waiter.set_result(None)
+            self._admit()
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._waits)
+
+        def pct(p: float) -> float:
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 1) if waits else 0.0
+
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": self._running,
+            "queue_depth": self._queued,
+            "queued_keys": len(self._queues),
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_full,
+            "rejected_wait_timeout": self.rejected_timeout,
+            "wait_ms_p50": pct(0.50),
+            "wait_ms_p99": pct(0.99),
+        }
@@ -0,0 +1,45 @@
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+
+# Curriculum responses sit behind auth: browsers may keep them but must revalidate on
+# every use, which costs a body-less 304 while the ETag still matches.
+PRIVATE_REVALIDATE = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag from the values that fully determine a response (version ids, watermarks)."""
+    digest = hashlib.sha256("\0".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether If-None-Match names `etag` (weak comparison, as RFC 9110 asks for GET)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def conditional_response(
+    request: Request, response: Response, etag: str, cache_control: str = PRIVATE_REVALIDATE
+) -> Optional[Response]:
+    """Set the validator headers on `response`; returns a 304 to send instead when the client's copy is current.
+
+    Call it before building the body, so an unchanged resource is never serialised.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
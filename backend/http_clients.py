@@ -0,0 +1,81 @@
+import importlib.util
+import os
+from typing import Any, Dict
+
+import httpx
+
+
+# HTTP/2 needs the optional `h2` package (httpx[http2]); fall back to HTTP/1.1 without it.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def _limits(name: str, max_connections: int, max_keepalive: int) -> httpx.Limits:
+    prefix = name.upper()
+    return httpx.Limits(
+        max_connections=int(os.environ.get(f"{prefix}_MAX_CONNECTIONS", str(max_connections))),
+        max_keepalive_connections=int(os.environ.get(f"{prefix}_MAX_KEEPALIVE", str(max_keepalive))),
+        keepalive_expiry=60.0,
+    )
+
+
+# One pooled client per upstream so TLS handshakes and DNS lookups are paid once per
+# connection instead of once per request.
+UPSTREAMS: Dict[str, Dict[str, Any]] = {
+    "wandbox": {
+        "base_url": "https://wandbox.org",
+        "timeout": httpx.Timeout(30.0, connect=5.0),
+        "limits": _limits("wandbox", 50, 20),
+        "http2": False,
+    },
+    "brevo": {
+        "base_url": "https://api.brevo.com",
+        "timeout": httpx.Timeout(20.0, connect=5.0),
+        "limits": _limits("brevo", 10, 5),
+        "http2": True,
+    },
+    "groq": {
+        "base_url": "https://api.groq.com",
+        "timeout": httpx.Timeout(60.0, connect=5.0),
+        "limits": _limits("groq", 20, 10),
+        "http2": True,
+    },
+    "openrouter": {
+        "base_url": "https://openrouter.ai",
+        "timeout": httpx.Timeout(300.0, connect=10.0),
+        "limits": _limits("openrouter", 5, 2),
+        "http2": True,
+    },
+}
+
+http_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _build_client(name: str) -> httpx.AsyncClient:
+    config = UPSTREAMS[name]
+    return httpx.AsyncClient(
+        base_url=config["base_url"],
+        timeout=config["timeout"],
+        limits=config["limits"],
+        http2=config["http2"] and HTTP2_AVAILABLE,
+    )
+
+
+def init_http_clients() -> Dict[str, httpx.AsyncClient]:
+    for name in UPSTREAMS:
+        if name not in http_clients:
+            http_clients[name] = _build_client(name)
+    return http_clients
+
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    """Return the shared client for an upstream, creating it if startup has not run (e.g. scripts)."""
+    if name not in http_clients:
+        http_clients[name] = _build_client(name)
+    return http_clients[name]
+
+
+async def close_http_clients() -> None:
+    clients = list(http_clients.values())
+    http_clients.clear()
+    for client in clients:
+        await client.aclose()
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from ollama import AsyncClient
+
+logger = logging.getLogger(__name__)
+
+
+QUIZ_GRADER_MODEL = os.environ.get("QUIZ_GRADER_MODEL", "minimax-m2.7:cloud")
+# Shared by every submission in the process, so a burst of quizzes queues here instead of
+# fanning out to one thread per item.
+QUIZ_GRADER_MAX_CONCURRENCY = int(os.environ.get("QUIZ_GRADER_MAX_CONCURRENCY", "8"))
+QUIZ_GRADER_TIMEOUT_SECONDS = float(os.environ.get("QUIZ_GRADER_TIMEOUT_SECONDS", "60"))
+QUIZ_GRADER_RETRIES = int(os.environ.get("QUIZ_GRADER_RETRIES", "2"))
+QUIZ_GRADER_BACKOFF_SECONDS = float(os.environ.get("QUIZ_GRADER_BACKOFF_SECONDS", "0.5"))
+# Grade all of a submission's items with one structured call instead of one call each.
+QUIZ_GRADER_BATCH = os.environ.get("QUIZ_GRADER_BATCH", "true").lower() == "true"
+
+VERDICT_INSTRUCTION = "Respond with exactly one word: CORRECT or INCORRECT."
+_FIRST_WORD = re.compile(r"[A-Za-z]+")
+
+T = TypeVar("T")
+
+grader_client: Optional[AsyncClient] = None
+_slots: Optional[asyncio.Semaphore] = None
+_in_flight = 0
+_waiting = 0
+_calls = 0
+_retries = 0
+_failures = 0
+_batch_calls = 0
+_batch_fallbacks = 0
+_latencies: Deque[float] = deque(maxlen=1000)
+
+
+def get_grader_client() -> AsyncClient:
+    global grader_client
+    if grader_client is None:
+        # Host comes from OLLAMA_HOST, like the ollama CLI
+        grader_client = AsyncClient(timeout=QUIZ_GRADER_TIMEOUT_SECONDS)
+    return grader_client
+
+
+async def close_grader_client() -> None:
+    global grader_client
+    if grader_client is not None:
+        client, grader_client = grader_client, None
+        await client.close()
+
+
+async def ask_model(prompt: str, parse: Optional[Callable[[str], T]] = None) -> Any:
+    """Send one prompt to the grading model and return its reply text, or `parse(reply)`.
+
+    Calls share a process-wide concurrency limit; each attempt is bounded by
+    QUIZ_GRADER_TIMEOUT_SECONDS and failures are retried with jittered exponential backoff.
+    A reply that `parse` rejects by raising counts as a failed attempt. Raises the last
+    error once the retries are used up.
+    """
+    global _slots, _in_flight, _waiting, _calls, _retries, _failures
+    if _slots is None:
+        _slots = asyncio.Semaphore(QUIZ_GRADER_MAX_CONCURRENCY)
+
+    _waiting += 1
+    try:
+        await _slots.acquire()
+    finally:
+        _waiting -= 1
+    _in_flight += 1
+    started = time.perf_counter()
+    try:
+        for attempt in range(QUIZ_GRADER_RETRIES + 1):
+            _calls += 1
+            try:
+                response = await asyncio.wait_for(
+                    get_grader_client().chat(
+                        model=QUIZ_GRADER_MODEL,
+                        messages=[{"role": "user", "content": prompt}],
+                    ),
+                    timeout=QUIZ_GRADER_TIMEOUT_SECONDS,
+                )
+                reply = response.message.content
+                return parse(reply) if parse else reply
+            except Exception as exc:
+                if attempt == QUIZ_GRADER_RETRIES:
+                    _failures += 1
+                    logger.warning("Grading call failed after %d attempts: %s", attempt + 1, exc)
+                    raise
+                _retries += 1
+                await asyncio.sleep(random.uniform(0, QUIZ_GRADER_BACKOFF_SECONDS * 2 ** attempt))
+    finally:
+        _latencies.append(time.perf_counter() - started)
+        _in_flight -= 1
+        _slots.release()
+
+
+def parse_verdict(reply: str) -> bool:
+    """Read a CORRECT/INCORRECT reply from the grading model.
+
+    Only the first word counts and it must be exactly one of the two ("Not correct." is
+    not a pass); anything else raises ValueError.
+    """
+    match = _FIRST_WORD.search(reply)
+    verdict = match.group(0).upper() if match else ""
+    if verdict not in ("CORRECT", "INCORRECT"):
+        raise ValueError(f"Unreadable verdict: {reply[:80]!r}")
+    return verdict == "CORRECT"
+
+
+async def grade_one(task: str) -> bool:
+    """Grade one item; `task` describes it and ends with the yes/no question to answer."""
+    return await ask_model(f"{task}\n{VERDICT_INSTRUCTION}", parse=parse_verdict)
+
+
+def parse_batch_verdicts(reply: str, question_ids: List[int]) -> Dict[int, bool]:
+    """Pull the verdicts for `question_ids` out of a JSON-array reply; malformed entries are skipped."""
+    start, end = reply.find("["), reply.rfind("]")
+    if start < 0 or end < start:
+        return {}
+    try:
+        entries = json.loads(reply[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(entries, list):
+        return {}
+    wanted = set(question_ids)
+    verdicts: Dict[int, bool] = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        question_id, correct = entry.get("question_id"), entry.get("correct")
+        if type(question_id) is int and isinstance(correct, bool) and question_id in wanted:
+            if question_id in verdicts and verdicts[question_id] != correct:
+                # Contradictory answers for one item: trust neither
+                wanted.discard(question_id)
+                del verdicts[question_id]
+                continue
+            verdicts[question_id] = correct
+    return verdicts
+
+
+async def iter_grades(tasks: Dict[int, str]) -> AsyncIterator[Tuple[int, Optional[bool]]]:
+    """Grade several items, keyed by question id, with as few model calls as possible.
+
+    With QUIZ_GRADER_BATCH all items go into one prompt that asks for a JSON array of
+    verdicts; items whose verdict is missing or malformed are re-asked one by one. Yields
+    (question_id, verdict) as verdicts arrive; None means the model could not be reached.
+    """
+    global _batch_calls, _batch_fallbacks
+    remaining = dict(tasks)
+    if QUIZ_GRADER_BATCH and len(tasks) > 1:
+        sections = "\n\n".join(f"### Item question_id={qid}\n{task}" for qid, task in tasks.items())
+        prompt = (
+            f"You are grading {len(tasks)} items from one quiz submission. "
+            f"Grade each item independently.\n\n{sections}\n\n"
+            f"Respond with only a JSON array containing one object per item, for example "
+            f'[{{"question_id": 16, "correct": true}}], and no other text.'
+        )
+        _batch_calls += 1
+        try:
+            verdicts = parse_batch_verdicts(await ask_model(prompt), list(tasks))
+        except Exception:
+            verdicts = {}
+        _batch_fallbacks += len(tasks) - len(verdicts)
+        for qid, correct in verdicts.items():
+            del remaining[qid]
+            yield qid, correct
+
+    async def one(qid: int, task: str) -> Tuple[int, Optional[bool]]:
+        try:
+            return qid, await grade_one(task)
+        except Exception:
+            return qid, None
+
+    for next_done in asyncio.as_completed([one(qid, task) for qid, task in remaining.items()]):
+        yield await next_done
+
+
+def grader_stats() -> Dict[str, Any]:
+    latencies = sorted(_latencies)
+
+    def pct(p: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1) if latencies else 0.0
+
+    return {
+        "model": QUIZ_GRADER_MODEL,
+        "max_concurrency": QUIZ_GRADER_MAX_CONCURRENCY,
+        "in_flight": _in_flight,
+        "waiting": _waiting,
+        "calls": _calls,
+        "retries": _retries,
+        "failures": _failures,
+        "batch": QUIZ_GRADER_BATCH,
+        "batch_calls": _batch_calls,
+        "batch_fallback_items": _batch_fallbacks,
+        "latency_ms_p50": pct(0.50),
+        "latency_ms_p99": pct(0.99),
+    }
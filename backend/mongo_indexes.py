@@ -0,0 +1,209 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+
+def _exists(field: str) -> Dict[str, Any]:
+    # Legacy documents may lack the field; keep them out of unique indexes.
+    return {field: {"$exists": True}}
+
+
+# Indexes backing every query server.py issues against MongoDB, per collection.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True, partialFilterExpression=_exists("id")),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True, partialFilterExpression=_exists("email")),
+        IndexModel([("role", ASCENDING), ("course", ASCENDING)], name="role_course"),
+    ],
+    "progress": [
+        # Unique so concurrent upserts from /progress/complete-task cannot fork a day's record
+        IndexModel([("user_id", ASCENDING), ("day_number", ASCENDING)], name="user_day_unique", unique=True),
+    ],
+    "git_submissions": [
+        IndexModel([("user_id", ASCENDING), ("day_number", ASCENDING)], name="user_day_unique", unique=True),
+    ],
+    "code_snippets": [
+        IndexModel(
+            [("user_id", ASCENDING), ("day_number", ASCENDING), ("snippet_id", ASCENDING)],
+            name="user_day_snippet_unique",
+            unique=True,
+        ),
+    ],
+    "quiz_results": [
+        IndexModel([("user_id", ASCENDING), ("submitted_at", DESCENDING)], name="user_submitted"),
+    ],
+    "chat_conversations": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("updated_at", DESCENDING)], name="user_updated"),
+    ],
+    "chat_messages": [
+        IndexModel([("conversation_id", ASCENDING), ("seq", ASCENDING)], name="conversation_seq_unique", unique=True),
+    ],
+    "quiz_verdicts": [
+        IndexModel(
+            [("quiz_id", ASCENDING), ("question_id", ASCENDING), ("digest", ASCENDING)],
+            name="quiz_question_digest_unique",
+            unique=True,
+        ),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "enrollments": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True, partialFilterExpression=_exists("id")),
+        IndexModel([("email", ASCENDING), ("course", ASCENDING), ("status", ASCENDING)], name="email_course_status"),
+        IndexModel([("submitted_at", DESCENDING)], name="submitted_at"),
+    ],
+    "curriculum_overrides": [
+        IndexModel([("day_number", ASCENDING)], name="day_number_unique", unique=True),
+        # Newest override, the ETag watermark for /curriculum/overrides
+        IndexModel([("updated_at", DESCENDING)], name="updated_at"),
+    ],
+}
+
+
+# Indexes replaced by a declaration above; dropped before the replacement is built.
+SUPERSEDED_INDEXES: Dict[str, List[str]] = {
+    "progress": ["user_day"],
+}
+
+
+# (name, collection, filter, sort) for the queries on the request hot path.
+# Values are placeholders: explain() only needs the query shape.
+HOT_QUERIES: List[Tuple[str, str, Dict[str, Any], Optional[List[Tuple[str, int]]]]] = [
+    ("get_current_user", "users", {"id": "sample"}, None),
+    ("login", "users", {"email": "sample@example.com"}, None),
+    ("admin_user_list", "users", {"role": "intern", "course": "aiml"}, None),
+    ("get_progress", "progress", {"user_id": "sample"}, None),
+    ("progress_by_day", "progress", {"user_id": "sample", "day_number": 1}, None),
+    ("git_submission_by_day", "git_submissions", {"user_id": "sample", "day_number": 1}, None),
+    ("git_submissions_by_user", "git_submissions", {"user_id": "sample"}, None),
+    ("snippet_upsert", "code_snippets", {"user_id": "sample", "day_number": 1, "snippet_id": "sample"}, None),
+    ("snippets_by_user", "code_snippets", {"user_id": "sample"}, None),
+    ("quiz_attempts", "quiz_results", {"user_id": "sample"}, [("submitted_at", DESCENDING)]),
+    ("chat_conversation", "chat_conversations", {"id": "sample", "user_id": "sample"}, None),
+    ("chat_recent_messages", "chat_messages", {"conversation_id": "sample"}, [("seq", DESCENDING)]),
+    ("quiz_verdict", "quiz_verdicts", {"quiz_id": "sample", "question_id": 1, "digest": "sample"}, None),
+    ("enrollment_by_id", "enrollments", {"id": "sample"}, None),
+    (
+        "enrollment_duplicate_check",
+        "enrollments",
+        {"email": "sample@example.com", "course": "aiml", "status": {"$in": ["pending", "accepted"]}},
+        None,
+    ),
+    ("enrollment_list", "enrollments", {}, [("submitted_at", DESCENDING)]),
+    ("curriculum_override_by_day", "curriculum_overrides", {"day_number": 1}, None),
+    ("curriculum_override_watermark", "curriculum_overrides", {}, [("updated_at", DESCENDING)]),
+]
+
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """Create every declared index. Safe to run on each startup: existing indexes are left as-is."""
+    created: Dict[str, List[str]] = {}
+    for collection, indexes in INDEXES.items():
+        created[collection] = []
+        try:
+            existing = await db[collection].index_information()
+            for name in SUPERSEDED_INDEXES.get(collection, []):
+                if name in existing:
+                    await db[collection].drop_index(name)
+            if collection == "progress" and "user_day_unique" not in existing:
+                await dedupe_progress(db)
+        except OperationFailure as exc:
+            logger.error(f"Index bootstrap failed for {collection}: {exc}")
+            continue
+        # One createIndexes command per index: a single failing build must not stop the
+        # others (e.g. duplicate legacy emails must not cost users.id_unique).
+        for index in indexes:
+            try:
+                created[collection] += await db[collection].create_indexes([index])
+            except OperationFailure as exc:
+                # A conflicting index (same keys, different options) or duplicate data
+                # blocking a unique build must not take the API down.
+                logger.error(f"Index bootstrap failed for {collection}.{index.document['name']}: {exc}")
+    logger.info(f"MongoDB indexes ensured: {created}")
+    return created
+
+
+async def dedupe_progress(db) -> int:
+    """Merge duplicate (user_id, day_number) progress records so the unique index can be built.
+
+    The first record of each group is kept with the union of completed_tasks; it stays
+    completed if any duplicate was. Returns the number of records removed.
+    """
+    removed = 0
+    duplicates = db.progress.aggregate([
+        {"$sort": {"_id": 1}},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "day_number": "$day_number"},
+            "docs": {"$push": "$$ROOT"},
+            "count": {"$sum": 1},
+        }},
+        {"$match": {"count": {"$gt": 1}}},
+    ], allowDiskUse=True)
+    async for group in duplicates:
+        keeper, *extra = group["docs"]
+        tasks: List[str] = []
+        for doc in group["docs"]:
+            tasks.extend(t for t in doc.get("completed_tasks") or [] if t not in tasks)
+        update = {"completed_tasks": tasks}
+        completed = [doc for doc in group["docs"] if doc.get("is_completed")]
+        if completed:
+            update["is_completed"] = True
+            update["completed_at"] = next(
+                (doc["completed_at"] for doc in completed if doc.get("completed_at")), None
+            )
+        await db.progress.update_one({"_id": keeper["_id"]}, {"$set": update})
+        result = await db.progress.delete_many({"_id": {"$in": [doc["_id"] for doc in extra]}})
+        removed += result.deleted_count
+    if removed:
+        logger.warning(f"Merged {removed} duplicate progress records before building the unique index")
+    return removed
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    stages = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        if "stage" in node:
+            stages.append(node)
+        if "queryPlan" in node:
+            stack.append(node["queryPlan"])
+        if "inputStage" in node:
+            stack.append(node["inputStage"])
+        stack.extend(node.get("inputStages", []))
+    return stages
+
+
+async def explain_hot_queries(db) -> Dict[str, Any]:
+    """Run explain() on every hot query and flag the ones still planned as a collection scan."""
+    report = []
+    for name, collection, query, sort in HOT_QUERIES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            explanation = await cursor.explain()
+        except OperationFailure as exc:
+            report.append({"name": name, "collection": collection, "error": str(exc)})
+            continue
+        stages = _plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+        index_names = sorted({s["indexName"] for s in stages if s.get("indexName")})
+        stage_names = [s["stage"] for s in stages]
+        report.append({
+            "name": name,
+            "collection": collection,
+            "filter": list(query.keys()),
+            "stages": stage_names,
+            "indexes": index_names,
+            "collscan": "COLLSCAN" in stage_names,
+        })
+    return {
+        "queries": report,
+        "collscans": [r["name"] for r in report if r.get("collscan")],
+    }
@@ -0,0 +1,67 @@
+import math
+import re
+from typing import Any, Dict, List, Optional
+
+from code_execution import normalize_output
+
+
+# Options a question-bank entry may set under "compare"
+COMPARE_OPTIONS = {"float_tolerance", "unordered_lines", "case_insensitive"}
+DEFAULT_FLOAT_TOLERANCE = 1e-6
+
+_TOKEN = re.compile(r"[-+]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?|\w+|[^\w\s]")
+_NUMBER = re.compile(r"[-+]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?")
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN.findall(text)
+
+
+def _is_number(token: str) -> bool:
+    return _NUMBER.fullmatch(token) is not None
+
+
+def _same_tokens(expected: List[str], actual: List[str], tolerance: float) -> Optional[bool]:
+    """True if equal, False if only numbers differ (wrong values), None if the text differs."""
+    if len(expected) != len(actual):
+        return None
+    numbers_differ = False
+    for e, a in zip(expected, actual):
+        if e == a:
+            continue
+        if _is_number(e) and _is_number(a):
+            if not math.isclose(float(e), float(a), rel_tol=tolerance, abs_tol=tolerance):
+                numbers_differ = True
+            continue
+        return None
+    return not numbers_differ
+
+
+def compare_outputs(expected: str, actual: str, options: Optional[Dict[str, Any]] = None) -> Optional[bool]:
+    """Decide whether a program's output matches the expected output without the model.
+
+    Ignores line endings and whitespace between tokens, compares numbers within
+    `float_tolerance`, and honours the question's `unordered_lines` and
+    `case_insensitive` options. Returns True/False when the answer is clear-cut and
+    None when only a reviewer can tell (e.g. the wording or formatting differs).
+    """
+    options = options or {}
+    tolerance = float(options.get("float_tolerance", DEFAULT_FLOAT_TOLERANCE))
+    expected = normalize_output(expected).strip()
+    actual = normalize_output(actual).strip()
+    if options.get("case_insensitive"):
+        expected, actual = expected.casefold(), actual.casefold()
+    if expected == actual:
+        return True
+    if not actual:
+        return False
+
+    if options.get("unordered_lines"):
+        expected_lines = sorted(_tokens(line) for line in expected.split("\n") if line.strip())
+        actual_lines = sorted(_tokens(line) for line in actual.split("\n") if line.strip())
+        if len(expected_lines) == len(actual_lines) and all(
+            _same_tokens(e, a, tolerance) for e, a in zip(expected_lines, actual_lines)
+        ):
+            return True
+
+    return _same_tokens(_tokens(expected), _tokens(actual), tolerance)
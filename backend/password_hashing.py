@@ -0,0 +1,80 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import bcrypt
+from fastapi import HTTPException
+
+
+# bcrypt costs ~200-300 ms of CPU per call; run it on a dedicated pool so the event
+# loop keeps serving other requests, and shed load once too many calls are waiting.
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", "64"))
+
+password_executor: Optional[ThreadPoolExecutor] = None
+_pending = 0
+_rejected = 0
+_completed = 0
+
+
+def init_password_executor() -> ThreadPoolExecutor:
+    global password_executor
+    if password_executor is None:
+        password_executor = ThreadPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS,
+            thread_name_prefix="bcrypt",
+        )
+    return password_executor
+
+
+def close_password_executor() -> None:
+    global password_executor
+    if password_executor is not None:
+        password_executor.shutdown(wait=False, cancel_futures=True)
+        password_executor = None
+
+
+async def _run(fn: Callable[..., Any], *args: Any) -> Any:
+    global _pending, _rejected, _completed
+    if _pending >= PASSWORD_HASH_MAX_PENDING:
+        _rejected += 1
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please try again in a moment",
+            headers={"Retry-After": "1"},
+        )
+    _pending += 1
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(init_password_executor(), fn, *args)
+        _completed += 1
+        return result
+    finally:
+        _pending -= 1
+
+
+def _hashpw(password: str) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
+def _checkpw(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+async def hash_password(password: str) -> str:
+    return await _run(_hashpw, password)
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await _run(_checkpw, password, hashed)
+
+
+def password_hashing_stats() -> Dict[str, Any]:
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "max_pending": PASSWORD_HASH_MAX_PENDING,
+        "in_flight": min(_pending, PASSWORD_HASH_WORKERS),
+        "queue_depth": max(0, _pending - PASSWORD_HASH_WORKERS),
+        "completed": _completed,
+        "rejected": _rejected,
+    }
@@ -0,0 +1,68 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
+
+from output_compare import COMPARE_OPTIONS
+
+
+# Quiz definitions with answer keys, one JSON file per quiz. They are versioned in git with
+# the rest of the curriculum; bump `version` whenever a question or its key changes so
+# stored results can be traced back to the key they were graded against. Coding questions
+# may set "compare" options for the local output comparator (see output_compare).
+QUESTION_BANK_DIR = Path(os.environ.get("QUESTION_BANK_DIR", str(Path(__file__).parent / "question_bank")))
+DEFAULT_QUIZ_ID = "final-quiz"
+
+_quizzes: Dict[str, Dict[str, Any]] = {}
+
+
+def _load(path: Path) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        quiz = json.load(f)
+    questions = {}
+    for q in quiz["questions"]:
+        if q["id"] in questions:
+            raise ValueError(f"{path.name}: duplicate question id {q['id']}")
+        if q["type"] == "mcq" and not 0 <= q["answer_index"] < len(q["options"]):
+            raise ValueError(f"{path.name}: question {q['id']} answer_index out of range")
+        unknown = set(q.get("compare", {})) - COMPARE_OPTIONS
+        if unknown:
+            raise ValueError(f"{path.name}: question {q['id']} has unknown compare options {sorted(unknown)}")
+        questions[q["id"]] = q
+    quiz["questions"] = questions
+    quiz["max_score"] = sum(q["marks"] for q in questions.values())
+    return quiz
+
+
+def load_question_bank() -> Dict[str, Dict[str, Any]]:
+    _quizzes.clear()
+    for path in sorted(QUESTION_BANK_DIR.glob("*.json")):
+        quiz = _load(path)
+        _quizzes[quiz["quiz_id"]] = quiz
+    return _quizzes
+
+
+def get_quiz(quiz_id: str) -> Dict[str, Any]:
+    if not _quizzes:
+        load_question_bank()
+    quiz = _quizzes.get(quiz_id)
+    if quiz is None:
+        raise HTTPException(status_code=404, detail=f"Unknown quiz: {quiz_id}")
+    return quiz
+
+
+def get_question(quiz: Dict[str, Any], question_id: int, question_type: str) -> Dict[str, Any]:
+    question = quiz["questions"].get(question_id)
+    if question is None or question["type"] != question_type:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Question {question_id} in {quiz['quiz_id']} is not of type {question_type}",
+        )
+    return question
+
+
+def grade_mcq(question: Dict[str, Any], selected_index: Optional[int]) -> bool:
+    """Grade a multiple-choice answer against the answer key; -1 / None means unanswered."""
+    return selected_index is not None and selected_index == question["answer_index"]
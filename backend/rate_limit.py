@@ -0,0 +1,223 @@
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _rate(name: str, default: str) -> Optional[Tuple[float, float]]:
+    """Parse "<requests>/<seconds>" from RATE_LIMIT_<NAME>, or the default; "off" disables it."""
+    spec = os.environ.get(f"RATE_LIMIT_{name.upper()}", default).strip().lower()
+    if spec in ("", "off", "0"):
+        return None
+    requests, seconds = spec.split("/")
+    return float(requests), float(seconds)
+
+
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_MAX_KEYS = int(os.environ.get("RATE_LIMIT_MAX_KEYS", "100000"))
+
+# Route groups: which (method, path) they cover and the bucket applied per logged-in user
+# or, for anonymous callers, per client IP. Signed-in users never draw from the IP bucket,
+# so a cohort behind one office NAT is not capped by a single shared budget.
+# `account` adds a second, narrower bucket for anonymous callers keyed on (IP, a JSON body
+# field): login attempts are limited per account from each address, while the coarser IP
+# bucket still caps how many accounts one address can try.
+RATE_LIMIT_POLICIES: Dict[str, Dict[str, Any]] = {
+    "chat": {
+        "routes": [("POST", "/api/chat"), ("POST", "/api/chat/stream")],
+        "user": _rate("chat_user", "20/60"),
+        "ip": _rate("chat_ip", "60/60"),
+    },
+    "quiz_grade": {
+        "routes": [("POST", "/api/quiz/grade"), ("POST", "/api/quiz/grade/stream")],
+        "user": _rate("quiz_grade_user", "5/60"),
+        "ip": _rate("quiz_grade_ip", "30/60"),
+    },
+    "execute": {
+        "routes": [("POST", "/api/execute"), ("POST", "/api/execute/batch")],
+        "user": _rate("execute_user", "30/60"),
+        "ip": _rate("execute_ip", "60/60"),
+    },
+    "enrollments": {
+        "routes": [("POST", "/api/enrollments")],
+        "user": None,
+        "ip": _rate("enrollments_ip", "10/3600"),
+    },
+    "login": {
+        "routes": [("POST", "/api/auth/login"), ("POST", "/api/auth/admin-login")],
+        "user": None,
+        "ip": _rate("login_ip", "60/60"),
+        "account": _rate("login_account", "10/60"),
+        "account_field": "email",
+    },
+    "forgot_password": {
+        "routes": [("POST", "/api/auth/forgot-password")],
+        "user": None,
+        "ip": _rate("forgot_password_ip", "5/900"),
+    },
+}
+
+
+class TokenBuckets:
+    """Token buckets keyed by string, one (tokens, updated_at) pair per key.
+
+    Keys live in an LRU bounded by `max_keys`. Eviction goes by recency, so a drained bucket
+    that falls out comes back full; size `max_keys` well above the number of callers active
+    within one refill period.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.evictions = 0
+
+    def take(self, key: str, capacity: float, period: float, now: float) -> float:
+        """Take one token; returns 0 when allowed, else seconds until a token is available."""
+        refill_per_second = capacity / period
+        tokens, updated_at = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        return (1 - tokens) / refill_per_second
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying RATE_LIMIT_POLICIES before requests reach the routes.
+
+    `identify(headers)` returns the caller's user id from the request headers (without
+    touching the database) or None for anonymous requests. Throttled requests get a 429
+    with Retry-After and never reach the handler.
+    """
+
+    def __init__(self, app, identify: Callable[[Dict[str, str]], Optional[str]]):
+        self.app = app
+        self.identify = identify
+        self.buckets = TokenBuckets(RATE_LIMIT_MAX_KEYS)
+        self.routes: Dict[Tuple[str, str], str] = {
+            route: name for name, policy in RATE_LIMIT_POLICIES.items() for route in policy["routes"]
+        }
+        self.allowed: Dict[str, int] = {name: 0 for name in RATE_LIMIT_POLICIES}
+        self.throttled: Dict[str, Dict[str, int]] = {
+            name: {"user": 0, "ip": 0, "account": 0} for name in RATE_LIMIT_POLICIES
+        }
+        rate_limiters.append(self)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not RATE_LIMIT_ENABLED:
+            return await self.app(scope, receive, send)
+        name = self.routes.get((scope["method"], scope["path"].rstrip("/") or "/"))
+        if name is None:
+            return await self.app(scope, receive, send)
+
+        account = ""
+        if RATE_LIMIT_POLICIES[name].get("account"):
+            body = await _read_body(receive)
+            if body is None:
+                return
+            account = _body_field(body, RATE_LIMIT_POLICIES[name]["account_field"])
+            receive = _replay(body, receive)
+
+        retry_after = self._check(name, scope, account)
+        if retry_after:
+            body = json.dumps({"detail": "Too many requests. Please slow down and try again shortly."}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(math.ceil(retry_after)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+        self.allowed[name] += 1
+        await self.app(scope, receive, send)
+
+    def _check(self, name: str, scope, account: str = "") -> float:
+        policy = RATE_LIMIT_POLICIES[name]
+        user_id = None
+        if policy["user"]:
+            headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+            user_id = self.identify(headers)
+        checks: List[Tuple[str, str, Tuple[float, float]]] = []
+        if user_id:
+            checks.append(("user", f"{name}:user:{user_id}", policy["user"]))
+        else:
+            client = scope.get("client")
+            ip = client[0] if client else "unknown"
+            # Narrowest first, so hammering one account doesn't also drain the address's budget
+            if policy.get("account"):
+                checks.append(("account", f"{name}:account:{ip}:{account}", policy["account"]))
+            if policy["ip"]:
+                checks.append(("ip", f"{name}:ip:{ip}", policy["ip"]))
+        now = time.monotonic()
+        for scope_name, key, (capacity, period) in checks:
+            wait = self.buckets.take(key, capacity, period, now)
+            if wait:
+                self.throttled[name][scope_name] += 1
+                return wait
+        return 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": RATE_LIMIT_ENABLED,
+            "tracked_keys": len(self.buckets),
+            "evicted_keys": self.buckets.evictions,
+            "allowed": dict(self.allowed),
+            "throttled": {name: dict(counts) for name, counts in self.throttled.items()},
+        }
+
+
+async def _read_body(receive) -> Optional[bytes]:
+    """The whole request body, or None if the client disconnected first."""
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            return None
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            return body
+
+
+def _replay(body: bytes, receive):
+    """A receive callable that hands the already-read body to the app, then defers to `receive`."""
+    pending = True
+
+    async def replay():
+        nonlocal pending
+        if pending:
+            pending = False
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+
+def _body_field(body: bytes, field: str) -> str:
+    try:
+        value = json.loads(body).get(field)
+    except (ValueError, AttributeError):
+        return ""
+    return value.strip().lower() if isinstance(value, str) else ""
+
+
+# Instances built by Starlette when it assembles the middleware stack, for metrics
+rate_limiters: List[RateLimitMiddleware] = []
+
+
+def rate_limit_stats() -> Dict[str, Any]:
+    return rate_limiters[-1].stats() if rate_limiters else {"enabled": RATE_LIMIT_ENABLED}
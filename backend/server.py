@@ -1,23 +1,55 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 import certifi
 import os
+import json
 import logging
 from pathlib import Path
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
 import uuid
 from datetime import datetime, timezone, timedelta
-import bcrypt
 import jwt
 import httpx
 import asyncio
 from groq import AsyncGroq
-from curriculum_postgres import create_curriculum_postgres_router
+from chat_context import build_chat_context, chat_context_stats
+from chat_conversations import append_turn, conversation_cache_stats, load_conversation
+from code_execution import (
+    EXECUTION_BACKEND,
+    compiler_map_stats,
+    execution_cache,
+    execution_scheduler,
+    local_sandbox_problem,
+    run_code,
+    run_test_cases,
+    start_compiler_map_refresher,
+    stop_compiler_map_refresher,
+)
+from curriculum_postgres import create_curriculum_postgres_router, published_curriculum_stats
+from http_caching import conditional_response, make_etag
+from http_clients import close_http_clients, get_http_client, init_http_clients
+from llm_grader import close_grader_client, grader_stats, iter_grades
+from mongo_indexes import ensure_indexes, explain_hot_queries
+from output_compare import compare_outputs
+from password_hashing import (
+    close_password_executor,
+    hash_password,
+    init_password_executor,
+    password_hashing_stats,
+    verify_password,
+)
 from postgres import close_postgres_pool, init_postgres_pool
+from question_bank import DEFAULT_QUIZ_ID, get_question, get_quiz, grade_mcq, load_question_bank
+from rate_limit import RateLimitMiddleware, rate_limit_stats
+from ttl_cache import TTLCache
+from verdict_cache import get_verdict, purge_verdicts, store_verdict, verdict_cache_stats, verdict_key
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -135,9 +167,39 @@ BREVO_SENDER_EMAIL = os.environ.get('BREVO_SENDER_EMAIL', '')
 FROM_NAME = os.environ.get('FROM_NAME', 'Flyers Minds')
 FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
 
+# Authenticated user documents, keyed by user id. Every path that writes to db.users
+# must call user_cache.pop(user_id) so the next request re-reads the document.
+user_cache = TTLCache(
+    maxsize=int(os.environ.get('USER_CACHE_SIZE', '2048')),
+    ttl=float(os.environ.get('USER_CACHE_TTL_SECONDS', '60')),
+)
+
+# Tutor replies to first-turn questions (no history), keyed by the normalised message.
+# Opt-in: a cached answer is shared verbatim by everyone who asks the same thing.
+CHAT_CACHE_ENABLED = os.environ.get('CHAT_CACHE_ENABLED', 'false').lower() == 'true'
+chat_reply_cache = TTLCache(
+    maxsize=int(os.environ.get('CHAT_CACHE_SIZE', '1024')),
+    ttl=float(os.environ.get('CHAT_CACHE_TTL_SECONDS', str(24 * 3600))),
+)
+
 
 app = FastAPI()
 
+
+def rate_limit_identity(headers: dict) -> Optional[str]:
+    """User id from a valid bearer token, for per-user rate limits (no database lookup)."""
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM]).get("user_id")
+    except jwt.InvalidTokenError:
+        return None
+
+
+# Registered before CORS so CORS stays the outermost layer and 429s carry its headers
+app.add_middleware(RateLimitMiddleware, identify=rate_limit_identity)
+
 # Add CORS middleware FIRST
 app.add_middleware(
     CORSMiddleware,
@@ -193,7 +255,8 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str
-    history: Optional[List[ChatMessage]] = []
+    conversation_id: Optional[str] = None  # server-side history; omit to start a conversation
+    history: Optional[List[ChatMessage]] = []  # legacy clients that keep history themselves
 
 
 class UpdateEmail(BaseModel):
@@ -226,21 +289,28 @@ class CodeExecuteRequest(BaseModel):
     code: str
 
 
+class ExecuteTestCase(BaseModel):
+    stdin: str = ""
+    expected_output: str
+
+
+class CodeExecuteBatchRequest(BaseModel):
+    language: str
+    code: str
+    cases: List[ExecuteTestCase]
+
+
 class QuizMCQAnswer(BaseModel):
-    question_id: int
-    question: str
-    options: List[str]
+    question_id: int  # id in the question bank
     selected_index: int  # -1 if not answered
 
 class QuizCodingAnswer(BaseModel):
-    question_id: int
+    question_id: int  # id in the question bank
     actual_output: str
-    expected_output: str
     code: str = ""
-    runnable: bool = True
-    task_description: str = ""
 
 class QuizGradeRequest(BaseModel):
+    quiz_id: str = DEFAULT_QUIZ_ID
     mcq_answers: List[QuizMCQAnswer]
     coding_answers: List[QuizCodingAnswer]
 
@@ -265,67 +335,6 @@ class EnrollmentCreate(BaseModel):
     message: Optional[str] = None
 
 
-# Compiler cache populated lazily on first execution request
-_wandbox_compiler_map: dict = {}
-
-# Preferred compiler prefixes per language (newest first)
-_COMPILER_PREFS = {
-    "python":     ["cpython-3.13", "cpython-3.12", "cpython-3.11", "cpython-3.10"],
-    "javascript": ["nodejs-22", "nodejs-20", "nodejs-18"],
-    "java":       ["openjdk-21", "openjdk-17"],
-    "c":          ["gcc-14", "gcc-13", "gcc-12", "gcc-11"],
-    "cpp":        ["gcc-14", "gcc-13", "gcc-12", "gcc-11"],
-}
-
-_COMPILER_FALLBACK = {
-    "python":     "cpython-3.12.5",
-    "javascript": "nodejs-20.11.0",
-    "java":       "openjdk-21.0.1",
-    "c":          "gcc-13.2.0",
-    "cpp":        "gcc-13.2.0",
-}
-
-
-async def get_wandbox_compiler_map() -> dict:
-    """Fetch available Wandbox compilers once and cache them."""
-    global _wandbox_compiler_map
-    if _wandbox_compiler_map:
-        return _wandbox_compiler_map
-
-    try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get("https://wandbox.org/api/list.json")
-            if resp.status_code != 200:
-                raise ValueError(f"Wandbox list returned {resp.status_code}")
-            compiler_names = [c["name"] for c in resp.json()]
-
-        result = {}
-        for lang, prefs in _COMPILER_PREFS.items():
-            for pref in prefs:
-                match = next((n for n in compiler_names if n.startswith(pref)), None)
-                if match:
-                    result[lang] = match
-                    break
-            if lang not in result:
-                result[lang] = _COMPILER_FALLBACK[lang]
-
-        _wandbox_compiler_map = result
-        logger.info(f"Wandbox compilers selected: {_wandbox_compiler_map}")
-    except Exception as exc:
-        logger.warning(f"Wandbox compiler list fetch failed ({exc}), using fallback")
-        _wandbox_compiler_map = _COMPILER_FALLBACK.copy()
-
-    return _wandbox_compiler_map
-
-
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
-
-
 def create_token(user_id: str, role: str, expires_delta: timedelta = timedelta(days=7)) -> str:
     payload = {
         "user_id": user_id,
@@ -391,21 +400,20 @@ async def send_email(to_email: str, subject: str, html_content: str) -> bool:
         logger.error("BREVO_API_KEY or BREVO_SENDER_EMAIL not set — email not sent.")
         return False
     try:
-        async with httpx.AsyncClient(timeout=20) as http_client:
-            response = await http_client.post(
-                "https://api.brevo.com/v3/smtp/email",
-                headers={
-                    "api-key": BREVO_API_KEY,
-                    "Content-Type": "application/json",
-                    "accept": "application/json",
-                },
-                json={
-                    "sender": {"name": FROM_NAME, "email": BREVO_SENDER_EMAIL},
-                    "to": [{"email": to_email, "name": to_email}],
-                    "subject": subject,
-                    "htmlContent": html_content,
-                },
-            )
+        response = await get_http_client("brevo").post(
+            "/v3/smtp/email",
+            headers={
+                "api-key": BREVO_API_KEY,
+                "Content-Type": "application/json",
+                "accept": "application/json",
+            },
+            json={
+                "sender": {"name": FROM_NAME, "email": BREVO_SENDER_EMAIL},
+                "to": [{"email": to_email, "name": to_email}],
+                "subject": subject,
+                "htmlContent": html_content,
+            },
+        )
         if response.status_code in (200, 201):
             logger.info(f"Email sent successfully to {to_email} (status {response.status_code})")
             return True
@@ -425,16 +433,36 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         raise HTTPException(status_code=401, detail="Not authenticated. Please log in.")
     try:
         payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user = await db.users.find_one({"id": payload["user_id"]}, {"_id": 0})
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found. Please log in again.")
-        return user
+        user = user_cache.get(payload["user_id"])
+        if user is None:
+            user = await db.users.find_one({"id": payload["user_id"]}, {"_id": 0})
+            if not user:
+                raise HTTPException(status_code=401, detail="User not found. Please log in again.")
+            user_cache.set(payload["user_id"], user)
+        return dict(user)
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Session expired. Please log in again.")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid session. Please log in again.")
 
 
+async def get_optional_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Like get_current_user, but anonymous callers get None instead of a 401."""
+    if not credentials or not credentials.credentials:
+        return None
+    try:
+        return await get_current_user(credentials)
+    except HTTPException:
+        return None
+
+
+def client_key(request: Request, user: Optional[dict]) -> str:
+    """Identify the caller for fair queueing: the user id when logged in, else the client IP."""
+    if user:
+        return f"user:{user['id']}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
 @api_router.post("/auth/register")
 async def register(data: UserRegister):
     email = data.email.lower().strip()
@@ -456,7 +484,7 @@ async def register(data: UserRegister):
         "id": user_id,
         "name": data.name,
         "email": email,
-        "password_hash": hash_password(data.password),
+        "password_hash": await hash_password(data.password),
         "role": role,
         "course": data.course if role == "intern" else None,
         "created_at": datetime.now(timezone.utc).isoformat()
@@ -477,7 +505,7 @@ async def register(data: UserRegister):
 @api_router.post("/auth/login")
 async def login(data: UserLogin):
     user = await db.users.find_one({"email": data.email.lower().strip()}, {"_id": 0})
-    if not user or not verify_password(data.password, user["password_hash"]):
+    if not user or not await verify_password(data.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     # Regular users (interns) only
@@ -503,7 +531,7 @@ async def admin_login(data: AdminLogin):
         raise HTTPException(status_code=401, detail="Invalid admin code")
 
     user = await db.users.find_one({"email": data.email.lower().strip()}, {"_id": 0})
-    if not user or not verify_password(data.password, user["password_hash"]):
+    if not user or not await verify_password(data.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     # Must be admin role
@@ -575,8 +603,9 @@ async def reset_password(data: ResetPassword):
 
     await db.users.update_one(
         {"email": email},
-        {"$set": {"password_hash": hash_password(data.new_password), "updated_at": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"password_hash": await hash_password(data.new_password), "updated_at": datetime.now(timezone.utc).isoformat()}}
     )
+    user_cache.pop(user.get("id"))
 
     return {"message": "Password reset successfully"}
 
@@ -594,7 +623,7 @@ async def get_me(user=Depends(get_current_user)):
 
 @api_router.put("/user/email")
 async def update_email(data: UpdateEmail, user=Depends(get_current_user)):
-    if not verify_password(data.current_password, user["password_hash"]):
+    if not await verify_password(data.current_password, user["password_hash"]):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
 
     new_email = data.new_email.lower().strip()
@@ -609,6 +638,7 @@ async def update_email(data: UpdateEmail, user=Depends(get_current_user)):
         {"id": user["id"]},
         {"$set": {"email": new_email, "updated_at": datetime.now(timezone.utc).isoformat()}}
     )
+    user_cache.pop(user["id"])
     return {
         "message": "Email updated successfully",
         "user": {
@@ -628,12 +658,13 @@ async def update_avatar(data: UpdateAvatar, user=Depends(get_current_user)):
         {"id": user["id"]},
         {"$set": {"avatar": data.avatar, "updated_at": datetime.now(timezone.utc).isoformat()}}
     )
+    user_cache.pop(user["id"])
     return {"message": "Avatar updated successfully", "avatar": data.avatar}
 
 
 @api_router.put("/user/password")
 async def update_password(data: UpdatePassword, user=Depends(get_current_user)):
-    if not verify_password(data.current_password, user["password_hash"]):
+    if not await verify_password(data.current_password, user["password_hash"]):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
 
     if len(data.new_password) < 6:
@@ -641,8 +672,9 @@ async def update_password(data: UpdatePassword, user=Depends(get_current_user)):
 
     await db.users.update_one(
         {"id": user["id"]},
-        {"$set": {"password_hash": hash_password(data.new_password), "updated_at": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"password_hash": await hash_password(data.new_password), "updated_at": datetime.now(timezone.utc).isoformat()}}
     )
+    user_cache.pop(user["id"])
     return {"message": "Password updated successfully"}
 
 
@@ -653,71 +685,79 @@ async def get_progress(user=Depends(get_current_user)):
     ).to_list(1000)
 
     # Lazy-repair: if a day has a git submission + completed tasks but is_completed is
-    # still False (caused by old silent-failure bug), mark it complete now.
-    if user["role"] != "admin":
-        for p in progress:
-            if p.get("is_completed") or not p.get("completed_tasks"):
-                continue
-            git_sub = await db.git_submissions.find_one(
-                {"user_id": user["id"], "day_number": p["day_number"]}
+    # still False (caused by old silent-failure bug), mark it complete now. Runs once per
+    # user; the progress_repaired_at marker skips the pass on every later load.
+    if user["role"] != "admin" and not user.get("progress_repaired_at"):
+        now = datetime.now(timezone.utc).isoformat()
+        candidates = {
+            p["day_number"]: p for p in progress
+            if not p.get("is_completed") and p.get("completed_tasks")
+        }
+        if candidates:
+            git_days = await db.git_submissions.distinct(
+                "day_number",
+                {"user_id": user["id"], "day_number": {"$in": list(candidates)}}
             )
-            if git_sub:
-                await db.progress.update_one(
-                    {"user_id": user["id"], "day_number": p["day_number"]},
-                    {"$set": {
-                        "is_completed": True,
-                        "completed_at": datetime.now(timezone.utc).isoformat()
-                    }}
+            repairs = [
+                UpdateOne(
+                    {"user_id": user["id"], "day_number": day},
+                    {"$set": {"is_completed": True, "completed_at": now}}
                 )
-                p["is_completed"] = True  # also fix the in-memory copy returned now
+                for day in git_days
+            ]
+            if repairs:
+                await db.progress.bulk_write(repairs, ordered=False)
+            for day in git_days:
+                candidates[day]["is_completed"] = True  # also fix the in-memory copy returned now
+        await db.users.update_one(
+            {"id": user["id"]},
+            {"$set": {"progress_repaired_at": now}}
+        )
+        user_cache.pop(user["id"])
 
     return apply_month3_unlock_override(progress, user)
 
 
 @api_router.post("/progress/complete-task")
 async def complete_task(data: TaskComplete, user=Depends(get_current_user)):
-    progress = await db.progress.find_one(
-        {"user_id": user["id"], "day_number": data.day_number},
-        {"_id": 0}
-    )
-
-    if not progress:
-        progress = {
-            "id": str(uuid.uuid4()),
-            "user_id": user["id"],
-            "day_number": data.day_number,
-            "completed_tasks": [],
-            "is_completed": False,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }
-        await db.progress.insert_one(progress)
-
+    # One atomic upsert (update pipeline) instead of find/insert/update/find. The unique
+    # (user_id, day_number) index guarantees concurrent toggles land on the same record.
+    tasks = {"$ifNull": ["$completed_tasks", []]}
+    task_id = {"$literal": data.task_id}
     if data.completed:
-        await db.progress.update_one(
+        completed_tasks = {"$cond": [
+            {"$in": [task_id, tasks]},
+            tasks,
+            {"$concatArrays": [tasks, {"$literal": [data.task_id]}]},
+        ]}
+        is_completed = {"$ifNull": ["$is_completed", False]}
+    else:
+        completed_tasks = {"$filter": {"input": tasks, "cond": {"$ne": ["$$this", task_id]}}}
+        is_completed = False
+
+    update = [{"$set": {
+        "id": {"$ifNull": ["$id", str(uuid.uuid4())]},
+        "completed_tasks": completed_tasks,
+        "is_completed": is_completed,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }}]
+    try:
+        return await db.progress.find_one_and_update(
             {"user_id": user["id"], "day_number": data.day_number},
-            {
-                "$addToSet": {"completed_tasks": data.task_id},
-                "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}
-            }
+            update,
+            projection={"_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
         )
-    else:
-        await db.progress.update_one(
+    except DuplicateKeyError:
+        # Lost an insert race with a concurrent toggle; the record exists now, so update it
+        return await db.progress.find_one_and_update(
             {"user_id": user["id"], "day_number": data.day_number},
-            {
-                "$pull": {"completed_tasks": data.task_id},
-                "$set": {
-                    "updated_at": datetime.now(timezone.utc).isoformat(),
-                    "is_completed": False
-                }
-            }
+            update,
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER,
         )
 
-    updated = await db.progress.find_one(
-        {"user_id": user["id"], "day_number": data.day_number},
-        {"_id": 0}
-    )
-    return updated
-
 
 @api_router.post("/progress/complete-day")
 async def complete_day(data: dict, user=Depends(get_current_user)):
@@ -778,6 +818,64 @@ async def get_git_submission(day_number: int, user=Depends(get_current_user)):
     return submission or {}
 
 
+def admin_users_pipeline(query: dict) -> List[dict]:
+    """Aggregation for /admin/users: interns joined with their progress and git submissions.
+
+    Computes completed_days, active_days and git_submissions server-side so the admin
+    dashboard costs one round trip instead of two extra queries per intern.
+    """
+    def has_day(var: str) -> dict:
+        return {"$ne": [{"$ifNull": [f"$${var}.day_number", None]}, None]}
+
+    return [
+        {"$match": query},
+        {"$limit": 1000},
+        {"$project": {"_id": 0, "password_hash": 0}},
+        {"$lookup": {"from": "progress", "localField": "id", "foreignField": "user_id", "as": "progress"}},
+        {"$lookup": {"from": "git_submissions", "localField": "id", "foreignField": "user_id", "as": "git_docs"}},
+        {"$project": {"progress._id": 0}},
+        {"$addFields": {
+            "completed_days": {"$size": {"$filter": {
+                "input": "$progress", "as": "p", "cond": {"$and": ["$$p.is_completed"]},
+            }}},
+            # active_days = days with any activity: tasks started, completed, OR git submitted
+            "active_days": {"$size": {"$setUnion": [
+                {"$map": {
+                    "input": {"$filter": {"input": "$progress", "as": "p", "cond": {"$and": [
+                        has_day("p"),
+                        {"$or": [
+                            "$$p.is_completed",
+                            {"$gt": [{"$size": {"$ifNull": ["$$p.completed_tasks", []]}}, 0]},
+                        ]},
+                    ]}}},
+                    "as": "p",
+                    "in": "$$p.day_number",
+                }},
+                {"$map": {
+                    "input": {"$filter": {"input": "$git_docs", "as": "g", "cond": has_day("g")}},
+                    "as": "g",
+                    "in": "$$g.day_number",
+                }},
+            ]}},
+            "total_days": {"$literal": 120},
+            "git_submissions": {"$map": {
+                "input": {"$filter": {"input": "$git_docs", "as": "g", "cond": {"$and": [
+                    "$$g.day_number",
+                    {"$ne": [{"$ifNull": ["$$g.repo_url", ""]}, ""]},
+                ]}}},
+                "as": "g",
+                "in": {
+                    "day_number": "$$g.day_number",
+                    "repo_url": "$$g.repo_url",
+                    "branch": {"$ifNull": ["$$g.branch", None]},
+                    "submitted_at": {"$ifNull": ["$$g.submitted_at", None]},
+                },
+            }},
+        }},
+        {"$project": {"git_docs": 0}},
+    ]
+
+
 @api_router.get("/admin/users")
 async def get_all_users(course: Optional[str] = None, user=Depends(get_current_user)):
     if user["role"] != "admin":
@@ -791,61 +889,14 @@ async def get_all_users(course: Optional[str] = None, user=Depends(get_current_u
         else:
             query["course"] = course
 
-    users = await db.users.find(
-        query,
-        {"_id": 0, "password_hash": 0}
-    ).to_list(1000)
+    users = await db.users.aggregate(admin_users_pipeline(query)).to_list(1000)
 
     for u in users:
-        try:
-            user_id_str = u.get("id")
-            if not user_id_str:
-                u["progress"] = []
-                u["completed_days"] = 0
-                u["active_days"] = 0
-                u["total_days"] = 120
-                u["git_submissions"] = []
-                continue
-
-            progress = await db.progress.find(
-                {"user_id": user_id_str}, {"_id": 0}
-            ).to_list(1000)
-            git_subs = await db.git_submissions.find(
-                {"user_id": user_id_str}, {"_id": 0}
-            ).to_list(1000)
-
-            # Use .get() to avoid KeyError on any malformed records
-            git_day_nums = {g.get("day_number") for g in git_subs if g.get("day_number") is not None}
-
-            completed_days = sum(1 for p in progress if p.get("is_completed"))
-            # active_days = days with any activity: tasks started, completed, OR git submitted
-            active_day_set = {
-                p.get("day_number") for p in progress
-                if p.get("day_number") is not None and (p.get("is_completed") or p.get("completed_tasks"))
-            }
-            active_day_set.update(git_day_nums)
-            active_days = len(active_day_set)
-
-            u["progress"] = progress
-            u["completed_days"] = completed_days
-            u["active_days"] = active_days
-            u["total_days"] = 120
-            u["git_submissions"] = [
-                {
-                    "day_number": g.get("day_number"),
-                    "repo_url": g.get("repo_url"),
-                    "branch": g.get("branch"),
-                    "submitted_at": g.get("submitted_at"),
-                }
-                for g in git_subs
-                if g.get("day_number") and g.get("repo_url")
-            ]
-        except Exception as e:
-            logger.error(f"Error fetching progress for user {u.get('id', 'unknown')}: {e}")
+        # Legacy users without an id would otherwise match orphaned records
+        if not u.get("id"):
             u["progress"] = []
             u["completed_days"] = 0
             u["active_days"] = 0
-            u["total_days"] = 120
             u["git_submissions"] = []
 
     return users
@@ -900,8 +951,9 @@ async def admin_change_user_password(user_id: str, data: AdminPasswordChange, us
     target = await db.users.find_one({"id": user_id})
     if not target:
         raise HTTPException(status_code=404, detail="User not found")
-    hashed = bcrypt.hashpw(data.new_password.encode(), bcrypt.gensalt()).decode()
+    hashed = await hash_password(data.new_password)
     await db.users.update_one({"id": user_id}, {"$set": {"password_hash": hashed}})
+    user_cache.pop(user_id)
     return {"message": "Password updated successfully"}
 
 
@@ -930,54 +982,176 @@ async def get_user_snippets(user_id: str, user=Depends(get_current_user)):
     return snippets
 
 
+CHAT_MODEL = "moonshotai/kimi-k2-instruct-0905"
+
+groq_client: Optional[AsyncGroq] = None
+
+
+def get_groq_client() -> AsyncGroq:
+    """Process-wide Groq client on the shared pooled connection (see http_clients)."""
+    global groq_client
+    if groq_client is None:
+        groq_client = AsyncGroq(api_key=GROQ_API_KEY, http_client=get_http_client("groq"))
+    return groq_client
+
+
+def chat_cache_key(message: str, history: list) -> Optional[tuple]:
+    """Cache key for a first-turn question, or None when the reply must not be cached."""
+    if not CHAT_CACHE_ENABLED or history:
+        return None
+    text = " ".join(message.casefold().split()).rstrip("?!. ")
+    return (CHAT_MODEL, text) if text else None
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def resolve_chat_history(data: ChatRequest, user: dict):
+    """Return (conversation_id, history) for a chat request.
+
+    Requests carrying a conversation id continue that stored conversation. Legacy requests
+    with a client-side `history` are answered without storing anything (conversation_id
+    None); anything else starts a new conversation.
+    """
+    if data.conversation_id:
+        return data.conversation_id, await load_conversation(db, data.conversation_id, user["id"])
+    if data.history:
+        return None, [{"role": msg.role, "content": msg.content} for msg in data.history]
+    return str(uuid.uuid4()), []
+
+
+def classify_chat_error(e: Exception) -> str:
+    """Map a Groq failure to the error code ChatBot.js shows a message for."""
+    error_msg = str(e)
+    logger.error(f"Groq chat error: {error_msg}")
+
+    if "model" in error_msg.lower() or "404" in error_msg:
+        return "model_not_found"
+    elif "auth" in error_msg.lower() or "api key" in error_msg.lower() or "401" in error_msg:
+        return "auth_error"
+    elif "rate" in error_msg.lower() or "429" in error_msg:
+        return "rate_limit"
+    else:
+        return "service_error"
+
+
 @api_router.post("/chat")
 async def chat(data: ChatRequest, user=Depends(get_current_user)):
     if not GROQ_API_KEY:
         raise HTTPException(status_code=500, detail="Chatbot not configured")
 
-    try:
-        groq_client = AsyncGroq(api_key=GROQ_API_KEY)
-
-        messages = [{"role": "system", "content": CHATBOT_SYSTEM_PROMPT}]
+    conversation_id, history = await resolve_chat_history(data, user)
+    cache_key = chat_cache_key(data.message, history)
+    reply = chat_reply_cache.get(cache_key) if cache_key is not None else None
+    if reply is not None:
+        if conversation_id:
+            await append_turn(db, conversation_id, user["id"], data.message, reply)
+        return {"reply": reply, "conversation_id": conversation_id, "cache": "hit"}
 
-        for msg in data.history[-10:]:
-            messages.append({"role": msg.role, "content": msg.content})
-
-        messages.append({"role": "user", "content": data.message})
-
-        completion = await groq_client.chat.completions.create(
-            model="moonshotai/kimi-k2-instruct-0905",
-            messages=messages,
+    try:
+        completion = await get_groq_client().chat.completions.create(
+            model=CHAT_MODEL,
+            messages=build_chat_context(CHATBOT_SYSTEM_PROMPT, history, data.message),
             max_tokens=1024,
             temperature=0.7,
         )
-
         reply = completion.choices[0].message.content
-        return {"reply": reply}
-
     except Exception as e:
-        error_msg = str(e)
-        logger.error(f"Groq chat error: {error_msg}")
-
-        if "model" in error_msg.lower() or "404" in error_msg:
-            raise HTTPException(status_code=502, detail="model_not_found")
-        elif "auth" in error_msg.lower() or "api key" in error_msg.lower() or "401" in error_msg:
-            raise HTTPException(status_code=502, detail="auth_error")
-        elif "rate" in error_msg.lower() or "429" in error_msg:
-            raise HTTPException(status_code=502, detail="rate_limit")
-        else:
-            raise HTTPException(status_code=502, detail="service_error")
+        raise HTTPException(status_code=502, detail=classify_chat_error(e))
+
+    if cache_key is not None and reply:
+        chat_reply_cache.set(cache_key, reply)
+    if conversation_id:
+        await append_turn(db, conversation_id, user["id"], data.message, reply or "")
+    return {"reply": reply, "conversation_id": conversation_id}
+
+
+@api_router.post("/chat/stream")
+async def chat_stream(data: ChatRequest, user=Depends(get_current_user)):
+    """Stream the tutor's reply as Server-Sent Events.
+
+    Sends `delta` events with `{"content": ...}` as Groq produces tokens, then `done`
+    with the `conversation_id` to send next time; the turn is stored just before it.
+    Failures arrive as an `error` event carrying the same codes /chat returns as its
+    detail. If the client disconnects, Starlette cancels this generator and the upstream
+    request is closed with it.
+    """
+    if not GROQ_API_KEY:
+        raise HTTPException(status_code=500, detail="Chatbot not configured")
+
+    conversation_id, history = await resolve_chat_history(data, user)
+    cache_key = chat_cache_key(data.message, history)
+
+    async def stream():
+        cached = chat_reply_cache.get(cache_key) if cache_key is not None else None
+        if cached is not None:
+            yield sse_event("delta", {"content": cached})
+            if conversation_id:
+                await append_turn(db, conversation_id, user["id"], data.message, cached)
+            yield sse_event("done", {"conversation_id": conversation_id, "cache": "hit"})
+            return
+        upstream = None
+        parts = []
+        try:
+            upstream = await get_groq_client().chat.completions.create(
+                model=CHAT_MODEL,
+                messages=build_chat_context(CHATBOT_SYSTEM_PROMPT, history, data.message),
+                max_tokens=1024,
+                temperature=0.7,
+                stream=True,
+            )
+            async for chunk in upstream:
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    parts.append(content)
+                    yield sse_event("delta", {"content": content})
+            reply = "".join(parts)
+            if cache_key is not None and reply:
+                chat_reply_cache.set(cache_key, reply)
+            if conversation_id:
+                await append_turn(db, conversation_id, user["id"], data.message, reply)
+            yield sse_event("done", {"conversation_id": conversation_id})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            yield sse_event("error", {"detail": classify_chat_error(e)})
+        finally:
+            if upstream is not None:
+                # Shielded: on disconnect this runs while the task is being cancelled
+                await asyncio.shield(upstream.close())
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @api_router.get("/curriculum/overrides")
-async def get_curriculum_overrides_all(user=Depends(get_current_user)):
+async def get_curriculum_overrides_all(request: Request, response: Response, user=Depends(get_current_user)):
+    # Every write stamps updated_at, so the newest stamp plus the count identifies the set
+    latest = await db.curriculum_overrides.find_one(
+        {}, {"_id": 0, "updated_at": 1}, sort=[("updated_at", DESCENDING)]
+    )
+    count = await db.curriculum_overrides.estimated_document_count()
+    etag = make_etag(count, latest.get("updated_at") if latest else None)
+    not_modified = conditional_response(request, response, etag)
+    if not_modified:
+        return not_modified
     overrides = await db.curriculum_overrides.find({}, {"_id": 0}).to_list(1000)
     return overrides
 
 
 @api_router.get("/curriculum/{day_number}")
-async def get_curriculum_override(day_number: int, user=Depends(get_current_user)):
+async def get_curriculum_override(day_number: int, request: Request, response: Response, user=Depends(get_current_user)):
     override = await db.curriculum_overrides.find_one({"day_number": day_number}, {"_id": 0})
+    etag = make_etag(day_number, override.get("updated_at") if override else None)
+    not_modified = conditional_response(request, response, etag)
+    if not_modified:
+        return not_modified
     return override or {}
 
 
@@ -1010,148 +1184,207 @@ async def update_curriculum_day(day_number: int, data: CurriculumOverride, user=
 
 
 @api_router.post("/execute")
-async def execute_code(data: CodeExecuteRequest):
-    """Run code via Wandbox (server-side, no CORS, no API key needed)."""
-    compiler_map = await get_wandbox_compiler_map()
-    compiler = compiler_map.get(data.language)
-    if not compiler:
-        raise HTTPException(status_code=400, detail=f"Unsupported language: {data.language}")
-
-    # Build Wandbox payload — use file extension so GCC knows C vs C++
-    if data.language == "c":
-        payload = {"compiler": compiler, "codes": [{"file": "main.c", "code": data.code}]}
-    elif data.language == "java":
-        payload = {"compiler": compiler, "codes": [{"file": "Main.java", "code": data.code}]}
-    else:
-        payload = {"compiler": compiler, "code": data.code}
-
-    try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            resp = await client.post(
-                "https://wandbox.org/api/compile.json",
-                json=payload,
-                headers={"Content-Type": "application/json"},
-            )
-        if resp.status_code != 200:
-            raise HTTPException(status_code=502, detail=f"Execution service error: {resp.status_code}")
-
-        result = resp.json()
-
-        stdout = result.get("program_output", "")
-
-        stderr_parts = []
-        if result.get("compiler_error"):
-            stderr_parts.append(result["compiler_error"])
-        if result.get("program_error"):
-            stderr_parts.append(result["program_error"])
-        if result.get("signal"):
-            stderr_parts.append(f"Killed by signal: {result['signal']}")
-        stderr = "\n".join(stderr_parts)
-
-        status_str = result.get("status", "")
-        try:
-            exit_code = int(status_str)
-        except (ValueError, TypeError):
-            exit_code = 1 if stderr else 0
-
-        return {"run": {"stdout": stdout, "stderr": stderr, "code": exit_code}}
+async def execute_code(data: CodeExecuteRequest, request: Request, user=Depends(get_optional_user)):
+    """Run code on the configured execution backend (Wandbox or the local sandbox)."""
+    result = await run_code(data.language, data.code, client_key=client_key(request, user))
+    return {
+        "run": {"stdout": result["stdout"], "stderr": result["stderr"], "code": result["code"]},
+        "cache": result["cache"],
+    }
 
-    except httpx.TimeoutException:
-        raise HTTPException(status_code=504, detail="Code execution timed out")
-    except httpx.RequestError as exc:
-        raise HTTPException(status_code=502, detail=f"Failed to reach execution server: {exc}")
 
+@api_router.post("/execute/batch")
+async def execute_code_batch(data: CodeExecuteBatchRequest, request: Request, user=Depends(get_optional_user)):
+    """Run one program against several stdin / expected-output cases and grade each one."""
+    results = await run_test_cases(
+        data.language,
+        data.code,
+        [(case.stdin, case.expected_output) for case in data.cases],
+        client_key=client_key(request, user),
+    )
+    return {
+        "results": results,
+        "passed": sum(1 for r in results if r["passed"]),
+        "total": len(results),
+    }
 
-@api_router.post("/quiz/grade")
-async def grade_quiz(data: QuizGradeRequest, user=Depends(get_current_user)):
-    """Grade all quiz answers (MCQ + coding) using Ollama minimax-m2.7:cloud in parallel."""
-    from ollama import chat as ollama_chat
-    LABELS = ['A', 'B', 'C', 'D']
-
-    async def grade_one(prompt: str) -> bool:
-        def _call():
-            r = ollama_chat(
-                model='minimax-m2.7:cloud',
-                messages=[{'role': 'user', 'content': prompt}],
-            )
-            return 'CORRECT' in r.message.content.strip().upper()
-        try:
-            return await asyncio.to_thread(_call)
-        except Exception:
-            return False
 
-    async def grade_item(question_id: int, prompt):
-        if prompt is None:
-            return question_id, False
-        correct = await grade_one(prompt)
-        return question_id, correct
+def prepare_quiz_grading(data: QuizGradeRequest):
+    """Validate a submission and grade everything that needs no model call.
 
-    items = []  # (question_id, prompt | None)
+    MCQs are checked against the answer key and runnable coding answers against the
+    expected output (output_compare). Returns (quiz, graded, items) where `items` are the
+    (question_id, grading task, verdict cache key) left for grade_pending_items.
+    Each result records how it was decided in `graded_by`.
+    """
+    quiz = get_quiz(data.quiz_id)
+    question_ids = [a.question_id for a in data.mcq_answers] + [a.question_id for a in data.coding_answers]
+    if len(set(question_ids)) != len(question_ids):
+        raise HTTPException(status_code=400, detail="Each question may only be answered once")
 
+    graded = []
     for a in data.mcq_answers:
-        if a.selected_index < 0 or a.selected_index >= len(a.options):
-            items.append((a.question_id, None))
-        else:
-            opts = '\n'.join(f"{LABELS[i]}. {o}" for i, o in enumerate(a.options))
-            selected = f"{LABELS[a.selected_index]}. {a.options[a.selected_index]}"
-            prompt = (
-                f"You are grading a multiple choice question.\n\n"
-                f"Question: {a.question}\n\n"
-                f"Options:\n{opts}\n\n"
-                f"The student selected: {selected}\n\n"
-                f"Is this the correct answer? Respond with exactly one word: CORRECT or INCORRECT."
-            )
-            items.append((a.question_id, prompt))
+        question = get_question(quiz, a.question_id, "mcq")
+        graded.append({
+            "question_id": a.question_id,
+            "correct": grade_mcq(question, a.selected_index),
+            "correct_index": question["answer_index"],
+            "graded_by": "answer_key",
+        })
+
+    items = []  # (question_id, grading task, verdict cache key)
 
     for a in data.coding_answers:
-        if not a.runnable:
+        question = get_question(quiz, a.question_id, "coding")
+        if not question["runnable"]:
             # Cannot be executed in sandbox — review the code directly
-            if not a.code.strip() or a.code.strip() == a.task_description:
-                items.append((a.question_id, None))
+            if not a.code.strip() or a.code.strip() == question["question"]:
+                graded.append({"question_id": a.question_id, "correct": False, "graded_by": "unanswered"})
             else:
                 prompt = (
                     f"You are grading a programming exercise. Review the student's code.\n\n"
-                    f"Task: {a.task_description}\n\n"
-                    f"Expected behaviour:\n{a.expected_output}\n\n"
+                    f"Task: {question['question']}\n\n"
+                    f"Expected behaviour:\n{question['expected_output']}\n\n"
                     f"Student's code:\n{a.code}\n\n"
-                    f"Does the student's code correctly implement the required functionality? "
-                    f"Respond with exactly one word: CORRECT or INCORRECT."
+                    f"Does the student's code correctly implement the required functionality?"
                 )
-                items.append((a.question_id, prompt))
+                items.append((a.question_id, prompt, verdict_key(quiz, question, "code", a.code)))
         elif not a.actual_output.strip():
-            items.append((a.question_id, None))
+            graded.append({"question_id": a.question_id, "correct": False, "graded_by": "unanswered"})
         else:
+            decision = compare_outputs(question["expected_output"], a.actual_output, question.get("compare"))
+            if decision is not None:
+                graded.append({"question_id": a.question_id, "correct": decision, "graded_by": "comparator"})
+                continue
             prompt = (
                 f"You are grading a programming exercise. Compare the student's actual output "
                 f"with the expected output.\n\n"
-                f"Expected output:\n{a.expected_output}\n\n"
+                f"Expected output:\n{question['expected_output']}\n\n"
                 f"Student's actual output:\n{a.actual_output}\n\n"
-                f"Are these outputs equivalent (ignoring minor whitespace or formatting differences)? "
-                f"Respond with exactly one word: CORRECT or INCORRECT."
+                f"Are these outputs equivalent (ignoring minor whitespace or formatting differences)?"
             )
-            items.append((a.question_id, prompt))
+            items.append((a.question_id, prompt, verdict_key(quiz, question, "output", a.actual_output)))
+
+    return quiz, graded, items
+
+
+async def grade_pending_items(items):
+    """Yield results for the items the comparator left open: verdict cache first, then the model."""
+    cached = await asyncio.gather(*[get_verdict(db, key) for _, _, key in items])
+    misses = {}
+    for (qid, task, key), correct in zip(items, cached):
+        if correct is not None:
+            yield {"question_id": qid, "correct": correct, "graded_by": "cache"}
+        else:
+            misses[qid] = (task, key)
 
-    results = await asyncio.gather(*[grade_item(qid, prompt) for qid, prompt in items])
-    graded = [{"question_id": qid, "correct": correct} for qid, correct in results]
+    async for qid, correct in iter_grades({qid: task for qid, (task, _) in misses.items()}):
+        if correct is None:
+            # Not cached: a model outage must not stick to this answer
+            yield {"question_id": qid, "correct": False, "graded_by": "model_error"}
+            continue
+        await store_verdict(db, misses[qid][1], correct)
+        yield {"question_id": qid, "correct": correct, "graded_by": "model"}
+
+
+async def save_quiz_result(user: dict, quiz: dict, graded: list) -> dict:
+    """Score graded answers with the question bank's marks and store the attempt."""
+    questions = quiz["questions"]
+    def score(question_type: str) -> int:
+        return sum(
+            questions[r["question_id"]]["marks"]
+            for r in graded
+            if r["correct"] and questions[r["question_id"]]["type"] == question_type
+        )
 
-    # Calculate scores: Q1-15 = MCQ (1 mark each), Q16-20 = coding (4 marks each)
-    mcq_score = sum(1 for r in graded if r["question_id"] <= 15 and r["correct"])
-    coding_score = sum(4 for r in graded if r["question_id"] > 15 and r["correct"])
+    mcq_score = score("mcq")
+    coding_score = score("coding")
     total_score = mcq_score + coding_score
+    max_score = quiz["max_score"]
+    summary = {
+        "total_score": total_score,
+        "max_score": max_score,
+        "mcq_score": mcq_score,
+        "coding_score": coding_score,
+        "percentage": round((total_score / max_score) * 100) if max_score else 0,
+    }
 
     # Save result to DB
     await db.quiz_results.insert_one({
         "user_id": user["id"],
+        "quiz_id": quiz["quiz_id"],
+        "quiz_version": quiz["version"],
         "submitted_at": datetime.now(timezone.utc).isoformat(),
-        "total_score": total_score,
-        "max_score": 35,
-        "mcq_score": mcq_score,
-        "coding_score": coding_score,
-        "percentage": round((total_score / 35) * 100),
+        **summary,
         "results": graded,
     })
+    return summary
+
+
+@api_router.post("/quiz/grade")
+async def grade_quiz(data: QuizGradeRequest, user=Depends(get_current_user)):
+    """Grade a quiz against the question bank and return every result at once."""
+    quiz, graded, items = prepare_quiz_grading(data)
+    graded.extend([result async for result in grade_pending_items(items)])
+    await save_quiz_result(user, quiz, graded)
+    return {"quiz_id": quiz["quiz_id"], "quiz_version": quiz["version"], "results": graded}
+
+
+# Strong references to grading runs that outlive their stream (asyncio keeps only weak ones)
+_grading_tasks: set = set()
+
+
+@api_router.post("/quiz/grade/stream")
+async def grade_quiz_stream(data: QuizGradeRequest, user=Depends(get_current_user)):
+    """Grade a quiz like /quiz/grade, streaming Server-Sent Events as results come in.
+
+    Emits a `verdict` event per question (answer-key and comparator results first, then
+    cached and model verdicts as they arrive) and a final `score` event. Grading runs in
+    its own task, so the attempt is still saved if the client disconnects mid-stream.
+    """
+    quiz, graded, items = prepare_quiz_grading(data)
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def run_grading():
+        try:
+            for result in graded:
+                events.put_nowait(sse_event("verdict", result))
+            async for result in grade_pending_items(items):
+                graded.append(result)
+                events.put_nowait(sse_event("verdict", result))
+            summary = await save_quiz_result(user, quiz, graded)
+            events.put_nowait(sse_event("score", {
+                "quiz_id": quiz["quiz_id"],
+                "quiz_version": quiz["version"],
+                **summary,
+            }))
+        except Exception:
+            logger.exception("Streaming quiz grading failed")
+            events.put_nowait(sse_event("error", {"detail": "Grading failed, please try again"}))
+        finally:
+            events.put_nowait(None)
+
+    task = asyncio.create_task(run_grading())
+    _grading_tasks.add(task)
+    task.add_done_callback(_grading_tasks.discard)
+
+    async def stream():
+        while (event := await events.get()) is not None:
+            yield event
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
-    return {"results": graded}
+@api_router.delete("/admin/quiz/{quiz_id}/questions/{question_id}/verdicts")
+async def purge_quiz_verdicts(quiz_id: str, question_id: int, user=Depends(get_current_user)):
+    """Drop cached model verdicts for one quiz question (admin only)."""
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return await purge_verdicts(db, quiz_id, question_id)
 
 
 @api_router.get("/admin/users/{user_id}/quiz")
@@ -1210,21 +1443,20 @@ async def test_brevo_email(data: dict, user=Depends(get_current_user)):
         raise HTTPException(status_code=500, detail="BREVO_API_KEY or BREVO_SENDER_EMAIL not configured in .env")
 
     try:
-        async with httpx.AsyncClient(timeout=20) as http_client:
-            response = await http_client.post(
-                "https://api.brevo.com/v3/smtp/email",
-                headers={
-                    "api-key": BREVO_API_KEY,
-                    "Content-Type": "application/json",
-                    "accept": "application/json",
-                },
-                json={
-                    "sender": {"name": FROM_NAME, "email": BREVO_SENDER_EMAIL},
-                    "to": [{"email": to_email}],
-                    "subject": "Flyers Minds — Brevo Test Email",
-                    "htmlContent": f"<p>This is a test email from Flyers Minds. Sent at {datetime.now(timezone.utc).isoformat()}.</p>",
-                },
-            )
+        response = await get_http_client("brevo").post(
+            "/v3/smtp/email",
+            headers={
+                "api-key": BREVO_API_KEY,
+                "Content-Type": "application/json",
+                "accept": "application/json",
+            },
+            json={
+                "sender": {"name": FROM_NAME, "email": BREVO_SENDER_EMAIL},
+                "to": [{"email": to_email}],
+                "subject": "Flyers Minds — Brevo Test Email",
+                "htmlContent": f"<p>This is a test email from Flyers Minds. Sent at {datetime.now(timezone.utc).isoformat()}.</p>",
+            },
+        )
         return {
             "brevo_status_code": response.status_code,
             "brevo_response": response.json() if response.headers.get("content-type", "").startswith("application/json") else response.text,
@@ -1509,7 +1741,7 @@ async def verify_course_access(token: str):
             "id": user_id,
             "name": name,
             "email": email,
-            "password_hash": hash_password(str(uuid.uuid4())),
+            "password_hash": await hash_password(str(uuid.uuid4())),
             "role": "intern",
             "course": course,
             "created_at": datetime.now(timezone.utc).isoformat(),
@@ -1533,6 +1765,35 @@ async def verify_course_access(token: str):
     }
 
 
+@api_router.get("/admin/metrics")
+async def get_metrics(user=Depends(get_current_user)):
+    """In-process cache and queue counters for this worker (admin only)."""
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return {
+        "user_cache": user_cache.stats(),
+        "rate_limit": rate_limit_stats(),
+        "chat_reply_cache": {**chat_reply_cache.stats(), "enabled": CHAT_CACHE_ENABLED},
+        "chat_context": chat_context_stats(),
+        "chat_conversations": conversation_cache_stats(),
+        "password_hashing": password_hashing_stats(),
+        "execution_cache": execution_cache.stats(),
+        "execution_scheduler": execution_scheduler.stats(),
+        "wandbox_compilers": compiler_map_stats(),
+        "quiz_grader": grader_stats(),
+        "quiz_verdict_cache": verdict_cache_stats(),
+        "pg_curriculum_cache": published_curriculum_stats(),
+    }
+
+
+@api_router.get("/admin/indexes/report")
+async def get_index_report(user=Depends(get_current_user)):
+    """Explain the hot Mongo queries and flag any still planned as a COLLSCAN (admin only)."""
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return await explain_hot_queries(db)
+
+
 @api_router.get("/health")
 async def health():
     return {"status": "healthy"}
@@ -1556,10 +1817,22 @@ async def root():
 
 @app.on_event("startup")
 async def startup():
+    init_password_executor()
+    init_http_clients()
+    start_compiler_map_refresher()
+    if EXECUTION_BACKEND == "local" and local_sandbox_problem():
+        logger.error(f"Local code execution refused: {local_sandbox_problem()}")
+    load_question_bank()
+    if GROQ_API_KEY:
+        get_groq_client()
     try:
         await init_postgres_pool()
     except Exception as exc:
         print(f"PostgreSQL curriculum connection failed: {exc}")
+    try:
+        await ensure_indexes(db)
+    except Exception as exc:
+        print(f"MongoDB index bootstrap failed: {exc}")
     print("\n" + "="*60)
     print("🚀 FLYERS MINDS API STARTING")
     print("="*60)
@@ -1592,8 +1865,12 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await stop_compiler_map_refresher()
     client.close()
     await close_postgres_pool()
+    close_password_executor()
+    await close_http_clients()
+    await close_grader_client()
 
 
 if __name__ == "__main__":
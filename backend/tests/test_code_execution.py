@@ -0,0 +1,134 @@
+"""
+Regression checks for the local execution sandbox.
+
+Needs root, util-linux and python3, plus an unprivileged account to run programs as
+(EXECUTION_RUNNER_USER, default "nobody"); no database or network. Runs under pytest,
+or directly:
+  python tests/test_code_execution.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("EXECUTION_RUNNER_USER", "nobody")
+
+import code_execution  # noqa: E402
+
+
+def _run(code: str):
+    started = time.monotonic()
+    result = asyncio.run(code_execution.run_local("python", code))
+    return result, time.monotonic() - started
+
+
+def _running_programs() -> int:
+    """Live processes of the runner account running a sandboxed main.py."""
+    runner_uid = code_execution._runner[0]
+    count = 0
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            if os.stat(f"/proc/{pid}").st_uid != runner_uid:
+                continue
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                args = f.read().split(b"\0")
+            with open(f"/proc/{pid}/stat") as f:
+                state = f.read().rsplit(")", 1)[1].split()[0]
+        except OSError:
+            continue
+        if b"main.py" in args and state != "Z":
+            count += 1
+    return count
+
+
+def test_sandbox_is_configured():
+    assert code_execution.local_sandbox_problem() is None
+
+
+def test_endless_output_is_cut_off_within_wall_limit():
+    result, elapsed = _run("while True: print(1)")
+    assert elapsed < code_execution.EXECUTION_WALL_SECONDS
+    assert "Output limit exceeded" in result["stderr"]
+    assert len(result["stdout"]) == code_execution.EXECUTION_OUTPUT_BYTES
+
+
+def test_single_huge_write_is_cut_off_within_wall_limit():
+    result, elapsed = _run("print('x' * 10**7)")
+    assert elapsed < code_execution.EXECUTION_WALL_SECONDS
+    assert "Output limit exceeded" in result["stderr"]
+
+
+def test_program_that_closes_its_output_is_still_time_limited():
+    result, elapsed = _run("import os, time\nos.close(1)\nos.close(2)\ntime.sleep(60)")
+    assert elapsed < code_execution.EXECUTION_WALL_SECONDS + 1
+    assert result["timed_out"]
+    assert result["code"] is not None
+
+
+def test_forked_children_do_not_outlive_the_run():
+    code = (
+        "import os, time\n"
+        "if os.fork() == 0:\n"
+        "    os.setsid()\n"
+        "    os.close(1)\n"
+        "    os.close(2)\n"
+        "    time.sleep(60)\n"
+        "print('parent done')\n"
+    )
+    result, _ = _run(code)
+    assert result["stdout"] == "parent done\n"
+    time.sleep(0.2)
+    assert _running_programs() == 0
+
+
+def test_fork_bomb_hits_the_process_limit():
+    result, elapsed = _run(
+        "import os, time\n"
+        "try:\n"
+        "    while True:\n"
+        "        if os.fork() == 0:\n"
+        "            time.sleep(60)\n"
+        "except OSError:\n"
+        "    print('stopped')\n"
+    )
+    assert result["stdout"] == "stopped\n"
+    assert elapsed < code_execution.EXECUTION_WALL_SECONDS
+
+
+def test_program_has_no_network():
+    result, _ = _run("import socket\nsocket.create_connection(('1.1.1.1', 53), timeout=2)")
+    assert "Network is unreachable" in result["stderr"]
+
+
+def test_program_cannot_read_files_private_to_the_api():
+    with tempfile.NamedTemporaryFile("w", suffix=".env") as secret:
+        secret.write("JWT_SECRET=do-not-leak\n")
+        secret.flush()
+        os.chmod(secret.name, 0o600)
+        result, _ = _run(f"print(open({secret.name!r}).read())")
+    assert "do-not-leak" not in result["stdout"]
+    assert "PermissionError" in result["stderr"]
+
+
+def test_signal_deaths_are_reported():
+    result, _ = _run("while True: pass")
+    assert result["signal"] == "SIGXCPU"
+
+
+def test_slots_are_released_after_runaway_output():
+    # Every run above must have given its permit back
+    for _ in range(code_execution.EXECUTION_LOCAL_WORKERS + 1):
+        _run("while True: print(1)")
+    result, _ = _run("print('ok')")
+    assert result["stdout"] == "ok\n"
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"ok  {name}")
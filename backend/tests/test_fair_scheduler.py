@@ -0,0 +1,180 @@
+"""
+Checks for the execution scheduler's admission order, limits and slot hand-over.
+
+No database, network or toolchains needed. Runs under pytest, or directly:
+  python tests/test_fair_scheduler.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fair_scheduler import FairScheduler, QueueFull, QueueTimeout  # noqa: E402
+
+
+def _scheduler(**overrides) -> FairScheduler:
+    options = {"max_concurrency": 1, "max_queue_per_key": 4, "max_queue": 100, "max_wait_seconds": 5.0}
+    options.update(overrides)
+    return FairScheduler(**options)
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_freed_slots_go_round_robin_across_keys():
+    async def scenario():
+        scheduler = _scheduler()
+        order = []
+        release_holder = asyncio.Event()
+
+        async def holder():
+            async with scheduler.slot("holder"):
+                await release_holder.wait()
+
+        async def job(key: str, label: str):
+            async with scheduler.slot(key):
+                order.append(label)
+                await asyncio.sleep(0)
+
+        first = asyncio.create_task(holder())
+        await _settle()
+        jobs = []
+        for key, label in [("a", "a1"), ("a", "a2"), ("a", "a3"), ("b", "b1"), ("c", "c1")]:
+            jobs.append(asyncio.create_task(job(key, label)))
+            await _settle()
+        release_holder.set()
+        await asyncio.gather(first, *jobs)
+        return order, scheduler.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == ["a1", "b1", "c1", "a2", "a3"]
+    assert stats["running"] == 0 and stats["queue_depth"] == 0 and stats["queued_keys"] == 0
+
+
+def test_full_queues_fail_fast():
+    async def scenario():
+        scheduler = _scheduler(max_queue_per_key=2, max_queue=3)
+        release = asyncio.Event()
+
+        async def hold(key: str):
+            async with scheduler.slot(key):
+                await release.wait()
+
+        tasks = [asyncio.create_task(hold(key)) for key in ("holder", "a", "a", "b")]
+        await _settle()
+        errors = []
+        for key in ("a", "c"):  # per-key limit, then the global limit
+            try:
+                await scheduler._acquire(key)
+            except QueueFull:
+                errors.append(key)
+        release.set()
+        await asyncio.gather(*tasks)
+        return errors, scheduler.stats()
+
+    errors, stats = asyncio.run(scenario())
+    assert errors == ["a", "c"]
+    assert stats["rejected_queue_full"] == 2
+    assert stats["running"] == 0 and stats["queue_depth"] == 0
+
+
+def test_waits_past_the_limit_time_out_and_leave_the_queue():
+    async def scenario():
+        scheduler = _scheduler(max_wait_seconds=0.05)
+        release = asyncio.Event()
+
+        async def hold():
+            async with scheduler.slot("holder"):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await _settle()
+        try:
+            async with scheduler.slot("a"):
+                raise AssertionError("should not have been admitted")
+        except QueueTimeout:
+            timed_out = True
+        depth = scheduler.stats()["queue_depth"]
+        release.set()
+        await holder
+        return timed_out, depth, scheduler.stats()
+
+    timed_out, depth, stats = asyncio.run(scenario())
+    assert timed_out and depth == 0
+    assert stats["rejected_wait_timeout"] == 1 and stats["running"] == 0
+
+
+def test_cancelled_waiter_passes_a_handed_over_slot_on():
+    async def scenario():
+        scheduler = _scheduler()
+        release = asyncio.Event()
+        ran = []
+
+        async def hold():
+            async with scheduler.slot("holder"):
+                await release.wait()
+
+        async def job(label: str):
+            async with scheduler.slot(label):
+                ran.append(label)
+
+        holder = asyncio.create_task(hold())
+        await _settle()
+        first = asyncio.create_task(job("first"))
+        second = asyncio.create_task(job("second"))
+        await _settle()
+
+        # The holder's release hands the slot to "first"; cancel it before it can resume
+        release.set()
+        while not scheduler._rotation or scheduler._rotation[0] != "second":
+            await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.gather(holder, second)
+        cancelled = first.cancelled() or isinstance(first.exception(), asyncio.CancelledError)
+        return ran, cancelled, scheduler.stats()
+
+    ran, cancelled, stats = asyncio.run(scenario())
+    assert cancelled
+    assert ran == ["second"]
+    assert stats["running"] == 0 and stats["queue_depth"] == 0
+
+
+def test_cancelled_waiter_still_queued_is_skipped():
+    async def scenario():
+        scheduler = _scheduler()
+        release = asyncio.Event()
+        ran = []
+
+        async def hold():
+            async with scheduler.slot("holder"):
+                await release.wait()
+
+        async def job(label: str):
+            async with scheduler.slot(label):
+                ran.append(label)
+
+        holder = asyncio.create_task(hold())
+        await _settle()
+        gone = asyncio.create_task(job("gone"))
+        kept = asyncio.create_task(job("kept"))
+        await _settle()
+        gone.cancel()
+        await _settle()
+        release.set()
+        await asyncio.gather(holder, kept)
+        return ran, scheduler.stats()
+
+    ran, stats = asyncio.run(scenario())
+    assert ran == ["kept"]
+    assert stats["running"] == 0 and stats["queue_depth"] == 0
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"ok  {name}")
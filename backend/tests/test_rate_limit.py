@@ -0,0 +1,132 @@
+"""
+Checks for the token buckets and the rate-limit middleware.
+
+No database or network needed. Runs under pytest, or directly:
+  python tests/test_rate_limit.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+
+from rate_limit import RATE_LIMIT_POLICIES, RateLimitMiddleware, TokenBuckets  # noqa: E402
+
+
+def test_bucket_allows_a_burst_then_reports_time_to_next_token():
+    buckets = TokenBuckets(max_keys=10)
+    # 2 requests per 10 s: one token every 5 s
+    assert buckets.take("k", 2, 10, now=0.0) == 0
+    assert buckets.take("k", 2, 10, now=0.0) == 0
+    assert buckets.take("k", 2, 10, now=0.0) == 5.0
+    assert buckets.take("k", 2, 10, now=2.5) == 2.5
+    assert buckets.take("k", 2, 10, now=5.0) == 0
+    assert buckets.take("k", 2, 10, now=5.0) == 5.0
+
+
+def test_bucket_refills_to_capacity_and_no_further():
+    buckets = TokenBuckets(max_keys=10)
+    for _ in range(2):
+        buckets.take("k", 2, 10, now=0.0)
+    # An hour idle still only buys a burst of two
+    assert buckets.take("k", 2, 10, now=3600.0) == 0
+    assert buckets.take("k", 2, 10, now=3600.0) == 0
+    assert buckets.take("k", 2, 10, now=3600.0) > 0
+
+
+def test_buckets_are_independent_per_key():
+    buckets = TokenBuckets(max_keys=10)
+    assert buckets.take("a", 1, 60, now=0.0) == 0
+    assert buckets.take("a", 1, 60, now=0.0) > 0
+    assert buckets.take("b", 1, 60, now=0.0) == 0
+
+
+def test_least_recently_used_keys_are_evicted():
+    buckets = TokenBuckets(max_keys=2)
+    buckets.take("a", 1, 60, now=0.0)
+    buckets.take("b", 1, 60, now=0.0)
+    buckets.take("a", 1, 60, now=1.0)  # throttled, but refreshes "a"
+    buckets.take("c", 1, 60, now=2.0)
+    assert len(buckets) == 2 and buckets.evictions == 1
+    # "a" is still drained; "b" was evicted, so it comes back full
+    assert buckets.take("a", 1, 60, now=3.0) > 0
+    assert buckets.take("b", 1, 60, now=3.0) == 0
+
+
+async def _ok(scope, receive, send):
+    message = await receive()
+    body = message.get("body", b"")
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+def _client(identify=lambda headers: headers.get("x-user")) -> httpx.AsyncClient:
+    app = RateLimitMiddleware(_ok, identify=identify)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t")
+
+
+def test_throttled_requests_get_429_with_retry_after():
+    capacity, period = RATE_LIMIT_POLICIES["login"]["account"]
+
+    async def scenario():
+        async with _client() as client:
+            responses = [
+                await client.post("/api/auth/login", json={"email": "a@x.com", "password": "p"})
+                for _ in range(int(capacity) + 1)
+            ]
+            other = await client.post("/api/auth/login", json={"email": "b@x.com", "password": "p"})
+        return responses, other
+
+    responses, other = asyncio.run(scenario())
+    assert [r.status_code for r in responses[:-1]] == [200] * int(capacity)
+    assert responses[-1].status_code == 429
+    # One token every period / capacity seconds, rounded up
+    assert int(responses[-1].headers["retry-after"]) == int(-(-period // capacity))
+    # The body was replayed to the app after the middleware read the email
+    assert responses[0].json()["email"] == "a@x.com"
+    assert other.status_code == 200
+
+
+def test_login_keeps_a_per_ip_cap_across_accounts():
+    ip_capacity, _ = RATE_LIMIT_POLICIES["login"]["ip"]
+
+    async def scenario():
+        async with _client() as client:
+            return [
+                (await client.post("/api/auth/login", json={"email": f"u{i}@x.com", "password": "p"})).status_code
+                for i in range(int(ip_capacity) + 1)
+            ]
+
+    codes = asyncio.run(scenario())
+    assert codes[:-1] == [200] * int(ip_capacity)
+    assert codes[-1] == 429
+
+
+def test_signed_in_users_do_not_draw_from_the_ip_bucket():
+    user_capacity, _ = RATE_LIMIT_POLICIES["execute"]["user"]
+    ip_capacity, _ = RATE_LIMIT_POLICIES["execute"]["ip"]
+    users = int(ip_capacity // user_capacity) + 1
+
+    async def scenario():
+        async with _client() as client:
+            codes = []
+            for user in range(users):
+                for _ in range(int(user_capacity)):
+                    response = await client.post("/api/execute", headers={"x-user": f"u{user}"}, json={})
+                    codes.append(response.status_code)
+        return codes
+
+    codes = asyncio.run(scenario())
+    # More requests from one address than the IP bucket holds, all within per-user budgets
+    assert len(codes) > ip_capacity
+    assert set(codes) == {200}
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"ok  {name}")
@@ -0,0 +1,92 @@
+import hashlib
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from code_execution import normalize_output
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+# Model verdicts for coding answers, keyed on (quiz_id, question_id, digest of the graded
+# input). Many interns submit the same output, so most submissions after the first are
+# answered here. With QUIZ_VERDICT_CACHE_PERSIST the verdicts are also kept in the
+# `quiz_verdicts` collection (expired by a TTL index) so they survive restarts.
+QUIZ_VERDICT_CACHE_TTL_SECONDS = float(os.environ.get("QUIZ_VERDICT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+QUIZ_VERDICT_CACHE_PERSIST = os.environ.get("QUIZ_VERDICT_CACHE_PERSIST", "false").lower() == "true"
+verdict_cache = TTLCache(
+    maxsize=int(os.environ.get("QUIZ_VERDICT_CACHE_SIZE", "10000")),
+    ttl=QUIZ_VERDICT_CACHE_TTL_SECONDS,
+)
+
+VerdictKey = Tuple[str, int, str]
+
+_stored_hits = 0
+
+
+def verdict_key(quiz: Dict[str, Any], question: Dict[str, Any], kind: str, graded_input: str) -> VerdictKey:
+    """Key for a verdict. `kind` is "output" (actual output) or "code" (non-runnable items).
+
+    The quiz version and the question's expected output are part of the digest, so editing
+    a question in the bank never serves a verdict given against the old one.
+    """
+    digest = hashlib.sha256()
+    for part in (str(quiz["version"]), kind, question["expected_output"], graded_input):
+        digest.update(normalize_output(part.strip()).encode("utf-8"))
+        digest.update(b"\0")
+    return quiz["quiz_id"], question["id"], digest.hexdigest()
+
+
+async def get_verdict(db, key: VerdictKey) -> Optional[bool]:
+    global _stored_hits
+    correct = verdict_cache.get(key)
+    if correct is not None or not QUIZ_VERDICT_CACHE_PERSIST:
+        return correct
+    quiz_id, question_id, digest = key
+    doc = await db.quiz_verdicts.find_one(
+        {"quiz_id": quiz_id, "question_id": question_id, "digest": digest},
+        {"_id": 0, "correct": 1},
+    )
+    if doc is None:
+        return None
+    _stored_hits += 1
+    verdict_cache.set(key, doc["correct"])
+    return doc["correct"]
+
+
+async def store_verdict(db, key: VerdictKey, correct: bool) -> None:
+    verdict_cache.set(key, correct)
+    if not QUIZ_VERDICT_CACHE_PERSIST:
+        return
+    quiz_id, question_id, digest = key
+    try:
+        await db.quiz_verdicts.update_one(
+            {"quiz_id": quiz_id, "question_id": question_id, "digest": digest},
+            {"$set": {
+                "correct": correct,
+                "expires_at": datetime.now(timezone.utc) + timedelta(seconds=QUIZ_VERDICT_CACHE_TTL_SECONDS),
+            }},
+            upsert=True,
+        )
+    except Exception as exc:
+        # The in-process copy is enough to serve this worker; don't fail the submission
+        logger.warning("Could not persist quiz verdict: %s", exc)
+
+
+async def purge_verdicts(db, quiz_id: str, question_id: int) -> Dict[str, int]:
+    """Forget every cached verdict for one question, e.g. after fixing its expected output.
+
+    Other workers keep their in-process copies until they expire.
+    """
+    purged = verdict_cache.pop_where(lambda key: key[0] == quiz_id and key[1] == question_id)
+    stored = 0
+    if QUIZ_VERDICT_CACHE_PERSIST:
+        result = await db.quiz_verdicts.delete_many({"quiz_id": quiz_id, "question_id": question_id})
+        stored = result.deleted_count
+    return {"purged_memory": purged, "purged_stored": stored}
+
+
+def verdict_cache_stats() -> Dict[str, Any]:
+    return {**verdict_cache.stats(), "persist": QUIZ_VERDICT_CACHE_PERSIST, "stored_hits": _stored_hits}
@@ -1,6 +1,5 @@
 import React, { useState, useEffect, useRef, useCallback } from 'react';
 import { useAuth } from '../App';
-import axios from 'axios';
 import { X, Send, MessageCircle, Bot, Trash2, ChevronDown, Maximize2, Minimize2 } from 'lucide-react';
 
 const WELCOME_MESSAGE = {
@@ -78,6 +77,8 @@ export default function ChatBot() {
   const [messages, setMessages]   = useState([WELCOME_MESSAGE]);
   const [input, setInput]         = useState('');
   const [loading, setLoading]     = useState(false);
+  const [streamingId, setStreamingId] = useState(null); // id of the reply being streamed
+  const [conversationId, setConversationId] = useState(null); // server-side history
   const [unread, setUnread]       = useState(0);
   const [size, setSize]           = useState({ w: DEFAULT_W, h: DEFAULT_H });
   const [pos, setPos]             = useState(null); // null = not yet positioned
@@ -198,19 +199,59 @@ export default function ChatBot() {
     if (!trimmed || loading) return;
 
     const userMsg = { role: 'user', content: trimmed, id: Date.now().toString() };
-    const history = messages.filter((m) => m.id !== 'welcome').map(({ role, content }) => ({ role, content }));
 
     setMessages((prev) => [...prev, userMsg]);
     setInput('');
     setLoading(true);
 
+    // The reply streams in over Server-Sent Events: the bubble appears with the first token
+    const botId = Date.now().toString() + '_bot';
     try {
-      const res = await axios.post(`${API}/chat`, { message: trimmed, history }, { headers: { Authorization: `Bearer ${token}` } });
-      const botMsg = { role: 'assistant', content: res.data.reply, id: Date.now().toString() + '_bot' };
-      setMessages((prev) => [...prev, botMsg]);
+      const res = await fetch(`${API}/chat/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', Authorization: `Bearer ${token}` },
+        body: JSON.stringify({ message: trimmed, conversation_id: conversationId }),
+      });
+      if (!res.ok || !res.body) {
+        const data = await res.json().catch(() => ({}));
+        throw new Error(data.detail || '');
+      }
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let started = false;
+      let finished = false;
+      while (!finished) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || '{}');
+          if (event === 'delta') {
+            if (!started) {
+              started = true;
+              setStreamingId(botId);
+              setMessages((prev) => [...prev, { role: 'assistant', content: data.content, id: botId }]);
+            } else {
+              setMessages((prev) => prev.map((m) => (m.id === botId ? { ...m, content: m.content + data.content } : m)));
+            }
+          } else if (event === 'done') {
+            finished = true;
+            setConversationId(data.conversation_id || null);
+          } else if (event === 'error') {
+            throw new Error(data.detail);
+          }
+        }
+      }
+      if (!finished) throw new Error('');
       if (!isOpen) setUnread((n) => n + 1);
     } catch (err) {
-      const detail = err?.response?.data?.detail || '';
+      const detail = err?.message || '';
+      // The server no longer knows this conversation: start a fresh one next time
+      if (detail === 'Conversation not found') setConversationId(null);
       let msg = "I'm having a moment — please try again in a few seconds!";
       if (detail === 'model_not_found') msg = "The AI model isn't available right now. Please try again shortly.";
       else if (detail === 'auth_error')  msg = "There's a configuration issue on our end. Please contact your mentor.";
@@ -218,6 +259,7 @@ export default function ChatBot() {
       setMessages((prev) => [...prev, { role: 'assistant', content: msg, id: Date.now().toString() + '_err' }]);
     } finally {
       setLoading(false);
+      setStreamingId(null);
     }
   };
 
@@ -273,7 +315,7 @@ export default function ChatBot() {
           </div>
 
           <div className="flex items-center gap-1">
-            <button onClick={() => setMessages([WELCOME_MESSAGE])} title="Clear chat"
+            <button onClick={() => { setMessages([WELCOME_MESSAGE]); setConversationId(null); }} title="Clear chat"
               className="flex h-7 w-7 items-center justify-center rounded-lg text-white/70 hover:bg-white/10 hover:text-white transition-colors">
               <Trash2 className="h-3.5 w-3.5" />
             </button>
@@ -312,8 +354,8 @@ export default function ChatBot() {
             </div>
           ))}
 
-          {/* Typing indicator */}
-          {loading && (
+          {/* Typing indicator (until the first token arrives) */}
+          {loading && !streamingId && (
             <div className="flex gap-2.5">
               <div className="flex h-7 w-7 shrink-0 items-center justify-center rounded-full bg-gradient-to-br from-[#0f766e] to-[#0e8a80] text-white shadow-sm">
                 <Bot className="h-4 w-4" />
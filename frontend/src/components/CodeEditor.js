@@ -128,7 +128,10 @@ export default function CodeEditor({ storageKey, index, onRemove, token, API, da
     try {
       const res = await fetch(`${API}/execute`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        // Token is optional; when present the server queues runs per user instead of per IP
+        headers: token
+          ? { 'Content-Type': 'application/json', Authorization: `Bearer ${token}` }
+          : { 'Content-Type': 'application/json' },
         body: JSON.stringify({ language: selectedLang.id, code }),
       });
       if (!res.ok) {
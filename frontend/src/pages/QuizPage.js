@@ -20,6 +20,10 @@ import {
 
 const OPTION_LABELS = ['A', 'B', 'C', 'D'];
 
+// Question ids match the server-side question bank (backend/question_bank/final-quiz.json),
+// which holds the answer keys.
+const QUIZ_ID = 'final-quiz';
+
 const QUIZ_QUESTIONS = [
   // ── Section 1: Multiple Choice (15 questions × 1 mark each) ──
   {
@@ -31,55 +35,46 @@ const QUIZ_QUESTIONS = [
       'Returns None',
       "Returns the ASCII value of '7'",
     ],
-    correctIndex: 1,
   },
   {
     id: 2, type: 'mcq', section: 1, topic: 'Python', marks: 1,
     question: 'In Python, what is the index of the last character in any string s?',
     options: ['len(s)', 'len(s) - 1', '-0', 's.last()'],
-    correctIndex: 1,
   },
   {
     id: 3, type: 'mcq', section: 1, topic: 'Python', marks: 1,
     question: 'Which of the following correctly creates an empty dictionary in Python?',
     options: ['my_dict = []', 'my_dict = ()', 'my_dict = {}', 'my_dict = set()'],
-    correctIndex: 2,
   },
   {
     id: 4, type: 'mcq', section: 1, topic: 'FastAPI', marks: 1,
     question: 'Which HTTP method is typically used to READ or retrieve data from an API?',
     options: ['POST', 'PUT', 'GET', 'DELETE'],
-    correctIndex: 2,
   },
   {
     id: 5, type: 'mcq', section: 1, topic: 'FastAPI', marks: 1,
     question: 'In FastAPI, which library is used for automatic data validation and serialisation?',
     options: ['Marshmallow', 'Pydantic', 'Cerberus', 'WTForms'],
-    correctIndex: 1,
   },
   {
     id: 6, type: 'mcq', section: 1, topic: 'FastAPI', marks: 1,
     question: 'Where can you find the auto-generated interactive documentation when running a FastAPI app locally?',
     options: ['/api-docs', '/swagger', '/docs', '/help'],
-    correctIndex: 2,
   },
   {
     id: 7, type: 'mcq', section: 1, topic: 'Machine Learning', marks: 1,
     question: 'What does NumPy stand for?',
     options: ['Numerical Python', 'Number Processing', 'New Math Python', 'Numeric Protocol'],
-    correctIndex: 0,
   },
   {
     id: 8, type: 'mcq', section: 1, topic: 'Machine Learning', marks: 1,
     question: 'In Pandas, what data structure is used to hold tabular (rows & columns) data?',
     options: ['Series', 'Array', 'Matrix', 'DataFrame'],
-    correctIndex: 3,
   },
   {
     id: 9, type: 'mcq', section: 1, topic: 'Machine Learning', marks: 1,
     question: 'Which Scikit-learn function splits a dataset into training and testing subsets?',
     options: ['model_selection.divide()', 'train_test_split()', 'dataset.split()', 'cross_validate()'],
-    correctIndex: 1,
   },
   {
     id: 10, type: 'mcq', section: 1, topic: 'Deep Learning', marks: 1,
@@ -90,13 +85,11 @@ const QUIZ_QUESTIONS = [
       'Slow inference speed',
       'Inability to process text',
     ],
-    correctIndex: 1,
   },
   {
     id: 11, type: 'mcq', section: 1, topic: 'Deep Learning', marks: 1,
     question: 'Which of the following correctly lists the three gates inside an LSTM unit?',
     options: ['Open, Close, Reset', 'Input, Output, Attention', 'Forget, Input, Output', 'Memory, Update, Erase'],
-    correctIndex: 2,
   },
   {
     id: 12, type: 'mcq', section: 1, topic: 'Deep Learning', marks: 1,
@@ -107,7 +100,6 @@ const QUIZ_QUESTIONS = [
       'How to compute the final output',
       'Which neurons to drop during training',
     ],
-    correctIndex: 1,
   },
   {
     id: 13, type: 'mcq', section: 1, topic: 'RAG & AI', marks: 1,
@@ -118,7 +110,6 @@ const QUIZ_QUESTIONS = [
       'Random Autoencoder Grouping',
       'Recursive Answer Generator',
     ],
-    correctIndex: 1,
   },
   {
     id: 14, type: 'mcq', section: 1, topic: 'RAG & AI', marks: 1,
@@ -129,7 +120,6 @@ const QUIZ_QUESTIONS = [
       'When the model runs out of memory',
       'When the model repeats the same sentence multiple times',
     ],
-    correctIndex: 1,
   },
   {
     id: 15, type: 'mcq', section: 1, topic: 'RAG & AI', marks: 1,
@@ -140,7 +130,6 @@ const QUIZ_QUESTIONS = [
       'Generate the final answer for the user',
       'Convert text into audio format',
     ],
-    correctIndex: 1,
   },
 
   // ── Section 2: Coding (5 questions × 4 marks each) ──
@@ -263,6 +252,7 @@ export default function QuizPage() {
   const [running, setRunning] = useState({});
   const [phase, setPhase] = useState('quiz'); // 'quiz' | 'score' | 'grading'
   const [gradingResults, setGradingResults] = useState({});
+  const [correctAnswers, setCorrectAnswers] = useState({});
 
   const question = QUIZ_QUESTIONS[currentQ];
   const totalQ = QUIZ_QUESTIONS.length;
@@ -280,13 +270,14 @@ export default function QuizPage() {
     try {
       const res = await fetch(`${API}/execute`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${token}` },
         body: JSON.stringify({ language: 'python', code }),
       });
       const data = await res.json();
+      if (!res.ok) throw new Error(data.detail);
       setOutputs((prev) => ({ ...prev, [id]: data.run }));
-    } catch {
-      setOutputs((prev) => ({ ...prev, [id]: { stdout: '', stderr: 'Failed to run code. Check your connection.', code: 1 } }));
+    } catch (err) {
+      setOutputs((prev) => ({ ...prev, [id]: { stdout: '', stderr: err.message || 'Failed to run code. Check your connection.', code: 1 } }));
     } finally {
       setRunning((prev) => ({ ...prev, [id]: false }));
     }
@@ -298,30 +289,49 @@ export default function QuizPage() {
 
     const mcq_answers = mcqQuestions.map((q) => ({
       question_id: q.id,
-      question: q.question,
-      options: q.options,
       selected_index: mcqAnswers[q.id] !== undefined ? mcqAnswers[q.id] : -1,
     }));
 
     const coding_answers = codingQuestions.map((q) => ({
       question_id: q.id,
       actual_output: outputs[q.id]?.stdout?.trim() || '',
-      expected_output: q.exampleOutput,
       code: codes[q.id] || '',
-      runnable: q.runnable !== false,
-      task_description: q.question,
     }));
 
+    // Verdicts stream in over Server-Sent Events; the grading screen counts them as they land
     try {
-      const res = await fetch(`${API}/quiz/grade`, {
+      const res = await fetch(`${API}/quiz/grade/stream`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${token}` },
-        body: JSON.stringify({ mcq_answers, coding_answers }),
+        body: JSON.stringify({ quiz_id: QUIZ_ID, mcq_answers, coding_answers }),
       });
-      const data = await res.json();
-      const map = {};
-      data.results.forEach((r) => { map[r.question_id] = r.correct; });
-      setGradingResults(map);
+      if (!res.ok || !res.body) throw new Error('Grading failed');
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let finished = false;
+      while (!finished) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || '{}');
+          if (event === 'verdict') {
+            setGradingResults((prev) => ({ ...prev, [data.question_id]: data.correct }));
+            if (data.correct_index !== undefined) {
+              setCorrectAnswers((prev) => ({ ...prev, [data.question_id]: data.correct_index }));
+            }
+          } else if (event === 'score') {
+            finished = true;
+          } else if (event === 'error') {
+            throw new Error(data.detail);
+          }
+        }
+      }
+      if (!finished) throw new Error('Grading stream ended early');
     } catch {
       const fallback = {};
       [...mcqQuestions, ...codingQuestions].forEach((q) => { fallback[q.id] = false; });
@@ -342,6 +352,7 @@ export default function QuizPage() {
     setOutputs({});
     setRunning({});
     setGradingResults({});
+    setCorrectAnswers({});
     setPhase('quiz');
     window.scrollTo({ top: 0, behavior: 'instant' });
   };
@@ -363,7 +374,9 @@ export default function QuizPage() {
         <div className="text-center px-4">
           <Loader2 className="h-12 w-12 animate-spin text-cyan-500 mx-auto mb-4" />
           <h2 className="font-heading text-xl font-bold text-slate-900 dark:text-white mb-2">Grading your answers…</h2>
-          <p className="text-sm text-slate-500 dark:text-slate-400">AI is checking all 20 questions in parallel. This may take a few seconds.</p>
+          <p className="text-sm text-slate-500 dark:text-slate-400">
+            {Object.keys(gradingResults).length} of {totalQ} questions graded. This may take a few seconds.
+          </p>
         </div>
       </div>
     );
@@ -428,9 +441,9 @@ export default function QuizPage() {
                         <span className="font-semibold">Q{idx + 1}.</span>{' '}
                         {q.question.length > 90 ? q.question.slice(0, 90) + '…' : q.question}
                       </p>
-                      {answered && !isCorrect && (
+                      {answered && !isCorrect && correctAnswers[q.id] !== undefined && (
                         <p className="mt-1 text-xs text-green-700 dark:text-green-400">
-                          Correct answer: <strong>{OPTION_LABELS[q.correctIndex]}. {q.options[q.correctIndex]}</strong>
+                          Correct answer: <strong>{OPTION_LABELS[correctAnswers[q.id]]}. {q.options[correctAnswers[q.id]]}</strong>
                         </p>
                       )}
                     </div>